@@ -54,11 +54,13 @@ def main():
     load_env()
     configure_logging()
 
-    from peanuts_bot import bot, health_probe
+    from peanuts_bot.bot import bot
     from peanuts_bot.config import CONFIG
 
-    if CONFIG.HEALTH_PROBE:
-        health_probe.start_background_server()
+    if CONFIG.HEALTH_PROBE and CONFIG.HEALTH_PROBE_MODE == "fastapi":
+        from peanuts_bot import health_probe
+
+        health_probe.start_background_server(bot)
 
     bot.run(CONFIG.BOT_TOKEN)
 
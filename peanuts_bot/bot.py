@@ -0,0 +1,153 @@
+import asyncio
+from contextlib import nullcontext
+import logging
+import typing
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from peanuts_bot.config import CONFIG
+from peanuts_bot.errors import handle_interaction_error
+from peanuts_bot.extensions import ALL_EXTENSIONS
+from peanuts_bot.extensions.internals import REQUIRED_EXTENSION_PROTOS
+from peanuts_bot.extensions.internals.lazy import LazyExtensions, sync_commands
+from peanuts_bot.health_probe import HealthProbe
+from peanuts_bot.libraries import workers
+from peanuts_bot.libraries.charts import ChartRenderer
+from peanuts_bot.libraries.discord.admin import (
+    ErrorReporter,
+    FeatureFlags,
+    report_error_to_admin,
+)
+from peanuts_bot.libraries.discord.metrics import record_command
+from peanuts_bot.libraries.discord.voice import BotVoice, announcer_rejoin_on_startup
+from peanuts_bot.libraries.emoji_requests import EmojiRequestStore
+from peanuts_bot.libraries.http_client import HttpClient
+from peanuts_bot.libraries.startup import StartupPhase, StartupProfiler
+from peanuts_bot.libraries.voice import TTSService
+
+logger = logging.getLogger(__name__)
+
+
+class _PeanutsTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        await LazyExtensions().load_for_interaction(interaction)
+        return True
+
+    async def on_error(
+        self,
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError,
+    ) -> None:
+        if interaction.command:
+            record_command(interaction.command.qualified_name, failed=True)
+        await handle_interaction_error(interaction, error)
+
+
+class PeanutsBot(commands.Bot):
+    def __init__(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.startup = StartupProfiler()
+        self._startup_sync: asyncio.Task[None] | None = None
+        self._connect_phase: StartupPhase | None = None
+
+    async def setup_hook(self):
+        with self.startup.phase("init_services"):
+            if CONFIG.HEALTH_PROBE:
+                HealthProbe.init(self, serve=CONFIG.HEALTH_PROBE_MODE != "fastapi")
+            HttpClient.init()
+            FeatureFlags.init()
+            ErrorReporter.init(self, CONFIG.DATA_DIR)
+            ChartRenderer.init()
+            EmojiRequestStore.init(CONFIG.DATA_DIR)
+            TTSService.init(CONFIG.CACHE_DIR)
+            BotVoice.init(self)
+
+        for ext_info in ALL_EXTENSIONS:
+            if ext_info.migrated and not ext_info.lazy:
+                with self.startup.phase(f"load_extension:{ext_info.module_path}"):
+                    await self.load_extension(ext_info.module_path)
+
+        with self.startup.phase("prepare_lazy_extensions"):
+            LazyExtensions.init(
+                self, [e for e in ALL_EXTENSIONS if e.migrated and e.lazy]
+            )
+            await LazyExtensions().prepare()
+
+        with self.startup.phase("validate_extensions"):
+            for proto in REQUIRED_EXTENSION_PROTOS:
+                for cog in self.cogs.values():
+                    if not isinstance(cog, proto):
+                        raise RuntimeError(
+                            f"{cog.__class__.__name__} does not implement {proto.__name__}"
+                        )
+
+        # syncing doesn't need the gateway, so let it run while the bot connects
+        self._startup_sync = asyncio.create_task(self.__sync_commands_on_startup())
+        self._connect_phase = self.startup.begin("connect_gateway")
+
+    async def __sync_commands_on_startup(self) -> None:
+        try:
+            with self.startup.phase("sync_commands"):
+                await sync_commands(self, force=CONFIG.FORCE_COMMAND_SYNC)
+        except Exception as e:
+            logger.exception("failed to sync commands on startup")
+            report_error_to_admin(e)
+            return
+        self.dispatch("tree_synced")
+
+    async def load_extension(self, name: str, *, package: str | None = None) -> None:
+        await super().load_extension(name, package=package)
+        self.dispatch("extensions_changed")
+
+    async def reload_extension(self, name: str, *, package: str | None = None) -> None:
+        await super().reload_extension(name, package=package)
+        self.dispatch("extensions_changed")
+
+    async def unload_extension(self, name: str, *, package: str | None = None) -> None:
+        await super().unload_extension(name, package=package)
+        self.dispatch("extensions_changed")
+
+    async def on_app_command_completion(
+        self,
+        _: discord.Interaction,
+        command: app_commands.Command | app_commands.ContextMenu,
+    ) -> None:
+        record_command(command.qualified_name)
+
+    async def on_ready(self) -> None:
+        is_startup = self.startup.ready_after is None
+        if self._connect_phase:
+            self.startup.end(self._connect_phase)
+
+        with self.startup.phase("on_ready") if is_startup else nullcontext():
+            await asyncio.gather(
+                self.change_presence(
+                    activity=discord.Activity(
+                        type=discord.ActivityType.watching, name="/help"
+                    )
+                ),
+                announcer_rejoin_on_startup(self),
+            )
+        self.startup.mark_ready()
+
+    async def close(self) -> None:
+        if self._startup_sync:
+            self._startup_sync.cancel()
+        await super().close()
+        HealthProbe.close()
+        BotVoice.close()
+        FeatureFlags.close()
+        ErrorReporter.close()
+        EmojiRequestStore.close()
+        workers.shutdown()
+        await HttpClient.close()
+
+
+bot = PeanutsBot(
+    command_prefix="!",
+    intents=discord.Intents.all(),
+    tree_cls=_PeanutsTree,
+    http_trace=HttpClient.create_trace_config(),
+)
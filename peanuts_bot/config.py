@@ -7,11 +7,20 @@ class EnvConfig(typedenv.EnvLoader, singleton=True):
     ENV: str
     """The env the bot is running on"""
     HEALTH_PROBE: bool = False
-    """When True, the bot will expose a ping HTTP endpoint for health checks"""
+    """When True, the bot will expose HTTP endpoints for health checks and metrics"""
+    HEALTH_PROBE_MODE: str = "asyncio"
+    """How the health endpoints are served: "asyncio" on the bot's event loop, or
+    "fastapi" in a separate uvicorn thread"""
     BOT_TOKEN: str
     """Auth token for the Discord bot"""
     LOG_LEVEL: str = "INFO"
     """The logging level for the bot"""
+    CACHE_DIR: str = ".cache"
+    """The directory the bot can write disposable cache files to"""
+    DATA_DIR: str = ".data"
+    """The directory the bot persists its state to"""
+    FORCE_COMMAND_SYNC: bool = False
+    """When True, the bot syncs its commands on startup even if they haven't changed"""
     GUILD_ID: int
     """The guild ID for the main guild the bot serves"""
     ADMIN_USER_ID: int
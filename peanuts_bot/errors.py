@@ -5,7 +5,7 @@ import discord
 from discord import app_commands
 
 from peanuts_bot.config import CONFIG
-from peanuts_bot.libraries.discord.admin import send_error_to_admin
+from peanuts_bot.libraries.discord.admin import report_error_to_admin
 
 logger = logging.getLogger(__name__)
 SOMETHING_WRONG = "Sorry, something went wrong. Try again later."
@@ -35,7 +35,7 @@ async def handle_interaction_error(
 
     try:
         await _send(SOMETHING_WRONG)
-        await send_error_to_admin(cause, interaction.client)
+        report_error_to_admin(cause)
     except Exception as e:
         raise e from cause
 
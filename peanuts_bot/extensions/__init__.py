@@ -10,6 +10,9 @@ class ExtInfo(NamedTuple):
     ext_name: str
     module_path: str
     migrated: bool = False
+    lazy: bool = False
+    """When True, the extension is only loaded the first time one of its commands
+    is used. Lazy extensions must only register app commands."""
 
 
 ALL_EXTENSIONS: list[ExtInfo] = [
@@ -20,12 +23,13 @@ ALL_EXTENSIONS: list[ExtInfo] = [
     ExtInfo("RNG", "peanuts_bot.extensions.rng", migrated=True),
     ExtInfo("User", "peanuts_bot.extensions.users", migrated=True),
     ExtInfo("Message", "peanuts_bot.extensions.messages", migrated=True),
+    ExtInfo("Admin", "peanuts_bot.extensions.admin", migrated=True),
 ]
 
 try:
     ALPHAV_CONNECTED()
     ALL_EXTENSIONS.append(
-        ExtInfo("Stock", "peanuts_bot.extensions.stocks", migrated=True)
+        ExtInfo("Stock", "peanuts_bot.extensions.stocks", migrated=True, lazy=True)
     )
 except ValueError:
     logger.warning("stocks api is not connected, skipping stocks commands")
@@ -33,7 +37,9 @@ except ValueError:
 try:
     MC_CONFIG()
     ALL_EXTENSIONS.append(
-        ExtInfo("Minecraft", "peanuts_bot.extensions.minecraft", migrated=True)
+        ExtInfo(
+            "Minecraft", "peanuts_bot.extensions.minecraft", migrated=True, lazy=True
+        )
     )
 except ValueError:
     logger.warning("minecraft server env not set, skipping minecraft commands")
@@ -0,0 +1,59 @@
+import logging
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from peanuts_bot.extensions.internals.lazy import sync_commands
+from peanuts_bot.libraries.discord.admin import FeatureFlags
+
+__all__ = ["AdminExtension"]
+
+logger = logging.getLogger(__name__)
+
+
+class AdminExtension(commands.Cog):
+    _bot_group = app_commands.Group(
+        name="bot",
+        description="Bot management commands",
+        default_permissions=discord.Permissions(administrator=True),
+    )
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+
+    @staticmethod
+    def get_help_color() -> discord.Color:
+        return discord.Color.from_str("#7F8C8D")
+
+    @_bot_group.command(name="features")
+    async def bot_features(self, interaction: discord.Interaction) -> None:
+        """[ADMIN-ONLY] Reload the feature flags from the bot's description"""
+        await interaction.response.defer(ephemeral=True)
+
+        feature_flags = FeatureFlags()
+        enabled_flags = sorted(f for f in await feature_flags.refresh() if f)
+        stats = feature_flags.stats
+
+        await interaction.followup.send(
+            f"Enabled features: {', '.join(enabled_flags) or 'none'}\n"
+            f"Cache hits: {stats.hits} | misses: {stats.misses} | "
+            f"refreshes: {stats.refreshes}",
+            ephemeral=True,
+        )
+
+    @_bot_group.command(name="sync")
+    async def bot_sync(self, interaction: discord.Interaction) -> None:
+        """[ADMIN-ONLY] Force the bot's commands to be synced with Discord"""
+        await interaction.response.defer(ephemeral=True)
+
+        synced = await sync_commands(self.bot, force=True) or []
+        self.bot.dispatch("tree_synced")
+
+        await interaction.followup.send(
+            f"Synced {len(synced)} commands", ephemeral=True
+        )
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(AdminExtension(bot))
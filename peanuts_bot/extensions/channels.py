@@ -12,7 +12,7 @@ from peanuts_bot.libraries.discord.voice import (
     get_active_user_ids,
     get_most_active_voice_channel,
 )
-from peanuts_bot.libraries.voice import generate_tts_audio
+from peanuts_bot.libraries.voice import TTSService
 
 __all__ = ["ChannelExtension"]
 
@@ -101,15 +101,16 @@ class ChannelExtension(commands.Cog):
             and before.channel != after.channel
         )
 
+        tts = TTSService()
+
         if joined and after.channel is not None:
             if bot_channel is None:
                 await after.channel.connect(self_deaf=True)
             elif after.channel.id == bot_channel.id:
-                BotVoice().queue_audio(
-                    generate_tts_audio(f"{member.display_name} has joined.")
-                )
+                BotVoice().announce_event(member.display_name, "joined")
 
         elif left and before.channel is not None:
+            tts.prewarm_member(member.display_name)
             if bot_channel is None or before.channel.id != bot_channel.id:
                 return
             vc = guild.voice_client
@@ -123,7 +124,7 @@ class ChannelExtension(commands.Cog):
                 return
             await vc.move_to(new_vc)
             bot_name = self.bot.user.name if self.bot.user else "Bot"
-            BotVoice().queue_audio(generate_tts_audio(f"{bot_name} has joined."))
+            BotVoice().announce_event(bot_name, "joined")
 
         elif moved and before.channel is not None and after.channel is not None:
             if bot_channel is None:
@@ -132,10 +133,9 @@ class ChannelExtension(commands.Cog):
             if not isinstance(vc, discord.VoiceClient):
                 return
             if after.channel.id == bot_channel.id:
-                BotVoice().queue_audio(
-                    generate_tts_audio(f"{member.display_name} has joined.")
-                )
+                BotVoice().announce_event(member.display_name, "joined")
             elif before.channel.id == bot_channel.id:
+                tts.prewarm_member(member.display_name)
                 if get_active_user_ids(vc):
                     return
                 # follow user to their destination (not most-active search)
@@ -145,9 +145,7 @@ class ChannelExtension(commands.Cog):
                     uid for uid in get_active_user_ids(vc) if uid != member.id
                 ]
                 if other_users:
-                    BotVoice().queue_audio(
-                        generate_tts_audio(f"{member.display_name} has joined.")
-                    )
+                    BotVoice().announce_event(member.display_name, "joined")
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -1,88 +1,66 @@
 import asyncio
-from dataclasses import dataclass
 import io
 import logging
+from pathlib import Path
 import re
+import tempfile
 import traceback
+from typing import Any
 
-import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from peanuts_bot.config import CONFIG
 from peanuts_bot.errors import BotUsageError, SOMETHING_WRONG, handle_interaction_error
+from peanuts_bot.libraries.discord.admin import get_admin_dm_channel
+from peanuts_bot.libraries.discord.lookup import (
+    get_or_fetch_channel,
+    get_or_fetch_member,
+)
 from peanuts_bot.libraries.discord.messaging import (
     disable_message_components,
     is_messagable,
 )
+from peanuts_bot.libraries.emoji_requests import (
+    EmojiRequest,
+    EmojiRequestStatus,
+    EmojiRequestStore,
+)
 from peanuts_bot.libraries.image import (
     MAX_EMOJI_FILE_SIZE,
+    MAX_EMOJI_SOURCE_SIZE,
     ImageType,
+    download_image,
     get_image_url,
     get_image_metadata,
     is_image,
+    shrink_image_to_size,
 )
+from peanuts_bot.libraries.workers import run_in_process
 
 __all__ = ["EmojiExtension"]
 
 logger = logging.getLogger(__name__)
 
-APPROVE_EMOJI_BTN = "approve_emoji_btn"
-REJECT_EMOJI_BTN = "deny_emoji_btn"
 SHORTCUT_TEXT_PREFIX = "shortcut_value_"
 
 _LABEL_PREFIX = "shortcut for "
 
+MAX_CONCURRENT_PROBES = 3
+"""the number of image metadata requests sent at once for a batch of emojis"""
 
-@dataclass
-class EmojiRequest:
-    """Holds the contextual information for a given Emoji Request"""
-
-    shortcut: str | None
-    url: str
-    file_type: ImageType
-    file_len: int
-    requester_id: int
-    channel_id: int
-
-    def to_approval_msg(self) -> str:
-        return (
-            "new emoji request:\n"
-            f"> shortcut: {self.shortcut}\n"
-            f"> url: {self.url}\n"
-            f"> requester_id: {self.requester_id}\n"
-            f"> channel_id: {self.channel_id}"
-        )
+_APPROVE_BUTTON_TEMPLATE = r"emoji_approve:(?P<id>[0-9]+)"
+_DENY_BUTTON_TEMPLATE = r"emoji_deny:(?P<id>[0-9]+)"
+_APPROVE_ALL_BUTTON_TEMPLATE = r"emoji_approve_all:(?P<ids>[0-9]+(,[0-9]+)*)"
 
-    @staticmethod
-    def from_approval_msg(msg: str) -> "EmojiRequest":
-        """Creates an EmojiRequest from a message created by `EmojiRequest.to_approval_msg()`"""
 
-        def _re_search(
-            pattern: str | re.Pattern[str], string: str, flags: int | re.RegexFlag = 0
-        ) -> re.Match[str]:
-            match = re.search(pattern, string, flags)
-            if not match:
-                raise ValueError("unable to parse message as an emoji request")
-            return match
+def _approve_custom_id(request_id: int) -> str:
+    return f"emoji_approve:{request_id}"
 
-        try:
-            shortcut = _re_search(r"> shortcut: (.*)", msg).group(1)
-            url = _re_search(r"> url: (.*)", msg).group(1)
-            requester_id = int(_re_search(r"> requester_id: (.*)", msg).group(1))
-            channel_id = int(_re_search(r"> channel_id: (.*)", msg).group(1))
-        except (AttributeError, TypeError, ValueError) as e:
-            raise ValueError("unable to parse message as an emoji request") from e
-
-        return EmojiRequest(
-            shortcut=shortcut,
-            url=url,
-            file_type=ImageType.PNG,
-            file_len=0,
-            requester_id=requester_id,
-            channel_id=channel_id,
-        )
+
+def _deny_custom_id(request_id: int) -> str:
+    return f"emoji_deny:{request_id}"
 
 
 def _get_file_name(img: discord.Attachment | discord.Embed) -> str:
@@ -124,15 +102,13 @@ class _EmojiNamesModal(discord.ui.Modal, title="Emoji Names"):
                 if isinstance(item, discord.ui.TextInput)
             }
 
-            emoji_requests = []
-            for field_id, shortcut in values.items():
-                if not shortcut:
-                    continue
-                index = int(field_id.replace(SHORTCUT_TEXT_PREFIX, ""))
-                url = get_image_url(self._images[index])
-                if not url:
-                    continue
-                content_type, content_length = await get_image_metadata(url)
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+
+            async def _probe(shortcut: str, url: str) -> EmojiRequest:
+                async with semaphore:
+                    content_type, content_length = await get_image_metadata(
+                        url, max_size=MAX_EMOJI_SOURCE_SIZE
+                    )
                 req = EmojiRequest(
                     shortcut=shortcut,
                     url=url,
@@ -141,38 +117,39 @@ class _EmojiNamesModal(discord.ui.Modal, title="Emoji Names"):
                     requester_id=interaction.user.id,
                     channel_id=self._channel_id,
                 )
-                emoji_requests.append(_request_emoji(req, interaction))
+                _validate_emoji_request(req)
+                return req
 
-            if not emoji_requests:
+            probes = []
+            for field_id, shortcut in values.items():
+                if not shortcut:
+                    continue
+                index = int(field_id.replace(SHORTCUT_TEXT_PREFIX, ""))
+                url = get_image_url(self._images[index])
+                if not url:
+                    continue
+                probes.append(_probe(shortcut, url))
+
+            if not probes:
                 await interaction.followup.send(
                     "No emoji requests sent", ephemeral=True
                 )
                 return
 
-            errors = [
-                e
-                for e in await asyncio.gather(*emoji_requests, return_exceptions=True)
-                if isinstance(e, Exception)
-            ]
+            results = await asyncio.gather(*probes, return_exceptions=True)
+            emoji_requests = [r for r in results if isinstance(r, EmojiRequest)]
+            errors = [r for r in results if isinstance(r, Exception)]
+
+            if emoji_requests:
+                await _send_approval_digest(interaction.client, emoji_requests)
 
             if not errors:
                 await interaction.followup.send("Emoji requests sent", ephemeral=True)
                 return
 
-            system_errors = [e for e in errors if not isinstance(e, BotUsageError)]
-            if system_errors:
-                logger.warning("Unexpected errors occurred in 1 or more emoji requests")
-            for e in system_errors:
-                logger.debug(
-                    f"\nEmoji request error:\n{''.join(traceback.format_exception(e))}"
-                )
-
-            error_strs = [
-                f"\n- {str(e) if isinstance(e, BotUsageError) else SOMETHING_WRONG}"
-                for e in errors
-            ]
             await interaction.followup.send(
-                f"The following errors occurred: {''.join(error_strs)}", ephemeral=True
+                f"The following errors occurred: {_format_errors(errors)}",
+                ephemeral=True,
             )
         except Exception as e:
             await handle_interaction_error(interaction, e)
@@ -187,27 +164,23 @@ class _EmojiRejectModal(discord.ui.Modal, title="Reject Emoji"):
         min_length=1,
     )
 
-    def __init__(self, approval_message: discord.Message) -> None:
+    def __init__(
+        self, emoji_request: EmojiRequest, approval_message: discord.Message
+    ) -> None:
         super().__init__()
+        self._emoji_request = emoji_request
         self._approval_message = approval_message
 
     async def on_submit(self, interaction: discord.Interaction) -> None:
         try:
-            try:
-                emoji_request = EmojiRequest.from_approval_msg(
-                    self._approval_message.content
-                )
-            except ValueError as e:
-                raise BotUsageError("invalid emoji request message") from e
-
-            channel = await interaction.client.fetch_channel(emoji_request.channel_id)
-            guild = interaction.client.get_guild(CONFIG.GUILD_ID)
-            if not guild or not is_messagable(channel):
-                raise BotUsageError("unable to reject emoji request")
-
-            requester = await guild.fetch_member(emoji_request.requester_id)
-            if not requester:
-                raise BotUsageError("unable to reject emoji request")
+            emoji_request = self._emoji_request
+            _, channel, requester = await _get_request_context(
+                interaction.client, emoji_request
+            )
+            if emoji_request.id is None or not EmojiRequestStore().resolve(
+                emoji_request.id, EmojiRequestStatus.REJECTED
+            ):
+                raise BotUsageError("emoji request was already resolved")
 
             await channel.send(
                 f'{requester.mention} your emoji "{emoji_request.shortcut}" was rejected with reason:\n> {self.reason.value}'
@@ -215,69 +188,158 @@ class _EmojiRejectModal(discord.ui.Modal, title="Reject Emoji"):
             await interaction.response.send_message(
                 f"rejected emoji {emoji_request.shortcut}", ephemeral=True
             )
-            await disable_message_components(self._approval_message)
+            await disable_message_components(
+                self._approval_message,
+                [
+                    _approve_custom_id(emoji_request.id),
+                    _deny_custom_id(emoji_request.id),
+                ],
+            )
         except Exception as e:
             await handle_interaction_error(interaction, e)
 
 
-class _EmojiApprovalView(discord.ui.View):
-    def __init__(self) -> None:
-        super().__init__(timeout=None)
+class ApproveEmojiButton(
+    discord.ui.DynamicItem[discord.ui.Button], template=_APPROVE_BUTTON_TEMPLATE
+):
+    def __init__(self, request_id: int, label: str = "Approve", row: int | None = None):
+        super().__init__(
+            discord.ui.Button(
+                label=label[:80],
+                style=discord.ButtonStyle.success,
+                custom_id=_approve_custom_id(request_id),
+                row=row,
+            )
+        )
+        self.request_id = request_id
 
-    @discord.ui.button(
-        label="Approve", style=discord.ButtonStyle.success, custom_id=APPROVE_EMOJI_BTN
-    )
-    async def approve_emoji(
-        self, interaction: discord.Interaction, button: discord.ui.Button
-    ) -> None:
-        if not interaction.message:
-            raise BotUsageError("unable to fetch message")
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: discord.Interaction,
+        item: discord.ui.Item[Any],
+        match: re.Match[str],
+    ) -> "ApproveEmojiButton":
+        return cls(int(match["id"]))
 
+    async def callback(self, interaction: discord.Interaction) -> None:
         try:
-            emoji_request = EmojiRequest.from_approval_msg(interaction.message.content)
-        except ValueError as e:
-            raise BotUsageError("invalid emoji request message") from e
+            if not interaction.message:
+                raise BotUsageError("unable to fetch message")
 
-        channel = await interaction.client.fetch_channel(emoji_request.channel_id)
-        guild = interaction.client.get_guild(CONFIG.GUILD_ID)
-        if not guild or not is_messagable(channel):
-            raise BotUsageError("unable to fulfill emoji request")
+            emoji_request = _get_pending_request(self.request_id)
+            await interaction.response.defer(ephemeral=True)
+            if not _claim_request(emoji_request):
+                raise BotUsageError("emoji request was already resolved")
 
-        requester = await guild.fetch_member(emoji_request.requester_id)
-        if not requester:
-            raise BotUsageError("unable to fulfill emoji request")
+            await _approve_emoji(interaction.client, emoji_request)
 
-        async with aiohttp.request("GET", emoji_request.url) as res:
-            image_data = await res.read()
+            await interaction.followup.send(
+                f"approved emoji {emoji_request.shortcut}", ephemeral=True
+            )
+            await disable_message_components(
+                interaction.message,
+                [_approve_custom_id(self.request_id), _deny_custom_id(self.request_id)],
+            )
+        except Exception as e:
+            await handle_interaction_error(interaction, e)
 
-        emoji = await guild.create_custom_emoji(
-            name=emoji_request.shortcut or "BADNAME",
-            image=image_data,
-            reason=f"Created by {requester.display_name} via bot commands",
-        )
-        await channel.send(f"{requester.mention} emoji {emoji} was created")
-        await interaction.response.send_message(
-            f"approved emoji {emoji_request.shortcut}", ephemeral=True
+
+class DenyEmojiButton(
+    discord.ui.DynamicItem[discord.ui.Button], template=_DENY_BUTTON_TEMPLATE
+):
+    def __init__(self, request_id: int, label: str = "Deny", row: int | None = None):
+        super().__init__(
+            discord.ui.Button(
+                label=label[:80],
+                style=discord.ButtonStyle.danger,
+                custom_id=_deny_custom_id(request_id),
+                row=row,
+            )
         )
-        await disable_message_components(interaction.message)
+        self.request_id = request_id
+
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: discord.Interaction,
+        item: discord.ui.Item[Any],
+        match: re.Match[str],
+    ) -> "DenyEmojiButton":
+        return cls(int(match["id"]))
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        try:
+            if not interaction.message:
+                raise BotUsageError("unable to fetch message")
+
+            emoji_request = _get_pending_request(self.request_id)
+            await interaction.response.send_modal(
+                _EmojiRejectModal(emoji_request, interaction.message)
+            )
+        except Exception as e:
+            await handle_interaction_error(interaction, e)
 
-    @discord.ui.button(
-        label="Deny", style=discord.ButtonStyle.danger, custom_id=REJECT_EMOJI_BTN
-    )
-    async def reject_emoji(
-        self, interaction: discord.Interaction, button: discord.ui.Button
-    ) -> None:
-        if not interaction.message:
-            raise BotUsageError("unable to fetch message")
-        await interaction.response.send_modal(_EmojiRejectModal(interaction.message))
 
-    async def on_error(
-        self,
+class ApproveAllEmojiButton(
+    discord.ui.DynamicItem[discord.ui.Button], template=_APPROVE_ALL_BUTTON_TEMPLATE
+):
+    def __init__(self, request_ids: list[int], row: int | None = None):
+        super().__init__(
+            discord.ui.Button(
+                label="Approve All",
+                style=discord.ButtonStyle.primary,
+                custom_id=f"emoji_approve_all:{','.join(map(str, request_ids))}",
+                row=row,
+            )
+        )
+        self.request_ids = request_ids
+
+    @classmethod
+    async def from_custom_id(
+        cls,
         interaction: discord.Interaction,
-        error: Exception,
-        item: discord.ui.Item,
-    ) -> None:
-        await handle_interaction_error(interaction, error)
+        item: discord.ui.Item[Any],
+        match: re.Match[str],
+    ) -> "ApproveAllEmojiButton":
+        return cls([int(i) for i in match["ids"].split(",")])
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        try:
+            if not interaction.message:
+                raise BotUsageError("unable to fetch message")
+
+            store = EmojiRequestStore()
+            # requests approved or denied individually in the meantime are skipped
+            emoji_requests = [
+                r
+                for r in (store.get(i) for i in self.request_ids)
+                if r and _claim_request(r)
+            ]
+            if not emoji_requests:
+                raise BotUsageError("all emoji requests were already resolved")
+
+            await interaction.response.defer(ephemeral=True)
+            results = await asyncio.gather(
+                *(_approve_emoji(interaction.client, r) for r in emoji_requests),
+                return_exceptions=True,
+            )
+
+            approved = [r for r, res in zip(emoji_requests, results) if res is None]
+            errors = [res for res in results if isinstance(res, Exception)]
+
+            custom_ids = [self.custom_id] if not errors else []
+            for r in approved:
+                if r.id is not None:
+                    custom_ids += [_approve_custom_id(r.id), _deny_custom_id(r.id)]
+            await disable_message_components(interaction.message, custom_ids)
+
+            msg = f"approved emojis: {', '.join(str(r.shortcut) for r in approved) or 'none'}"
+            if errors:
+                msg += f"\nThe following errors occurred: {_format_errors(errors)}"
+            await interaction.followup.send(msg, ephemeral=True)
+        except Exception as e:
+            await handle_interaction_error(interaction, e)
 
 
 class EmojiExtension(commands.Cog):
@@ -314,7 +376,9 @@ class EmojiExtension(commands.Cog):
                 "Not a valid file. Emoji images must be png, jpeg, or gif files."
             )
 
-        content_type, content_length = await get_image_metadata(url)
+        content_type, content_length = await get_image_metadata(
+            url, max_size=MAX_EMOJI_SOURCE_SIZE
+        )
         req = EmojiRequest(
             shortcut=shortcut,
             url=url,
@@ -323,7 +387,8 @@ class EmojiExtension(commands.Cog):
             requester_id=interaction.user.id,
             channel_id=interaction.channel_id or 0,
         )
-        await _request_emoji(req, interaction)
+        _validate_emoji_request(req)
+        await _send_approval_digest(interaction.client, [req])
         await interaction.response.send_message("Emoji request sent", ephemeral=True)
 
     async def _emoji_from_attachment(
@@ -335,7 +400,7 @@ class EmojiExtension(commands.Cog):
         )
 
 
-async def _request_emoji(req: EmojiRequest, interaction: discord.Interaction) -> None:
+def _validate_emoji_request(req: EmojiRequest) -> None:
     logger.debug(f"File type: {req.file_type}")
     if not is_valid_emoji_type(req.file_type):
         raise BotUsageError(
@@ -343,9 +408,9 @@ async def _request_emoji(req: EmojiRequest, interaction: discord.Interaction) ->
         )
 
     logger.debug(f"File size: {req.file_len}")
-    if req.file_len > MAX_EMOJI_FILE_SIZE:
+    if req.file_len > MAX_EMOJI_SOURCE_SIZE:
         raise BotUsageError(
-            f"File for '{req.shortcut}' is too large. Emoji images must be < {MAX_EMOJI_FILE_SIZE}"
+            f"File for '{req.shortcut}' is too large. Emoji images must be < {MAX_EMOJI_SOURCE_SIZE}"
         )
 
     if not req.shortcut or not is_valid_shortcut(req.shortcut):
@@ -353,10 +418,133 @@ async def _request_emoji(req: EmojiRequest, interaction: discord.Interaction) ->
             f"{req.shortcut} is not a valid shortcut. Emoji Shortcuts must be alphanumeric or underscore characters only."
         )
 
-    admin_user = await interaction.client.fetch_user(CONFIG.ADMIN_USER_ID)
-    if not admin_user:
-        raise BotUsageError("unable to find bot admin user")
-    await admin_user.send(req.to_approval_msg(), view=_EmojiApprovalView())
+
+async def _send_approval_digest(
+    client: discord.Client, reqs: list[EmojiRequest]
+) -> None:
+    """Stores the requests, and sends them to the admin as a single message with
+    approve/deny buttons for each request"""
+    try:
+        admin_channel = await get_admin_dm_channel(client)
+    except discord.NotFound as e:
+        raise BotUsageError("unable to find bot admin user") from e
+
+    store = EmojiRequestStore()
+    request_ids = [store.add(r) for r in reqs]
+
+    view = discord.ui.View(timeout=None)
+    for i, (req, request_id) in enumerate(zip(reqs, request_ids)):
+        view.add_item(
+            ApproveEmojiButton(request_id, f"Approve {req.shortcut}", row=i // 2)
+        )
+        view.add_item(DenyEmojiButton(request_id, f"Deny {req.shortcut}", row=i // 2))
+    if len(reqs) > 1:
+        view.add_item(ApproveAllEmojiButton(request_ids, row=(len(reqs) + 1) // 2))
+
+    await admin_channel.send(_to_approval_msg(reqs), view=view)
+
+
+def _to_approval_msg(reqs: list[EmojiRequest]) -> str:
+    lines = [
+        f"> {r.shortcut}: {r.url} ({r.file_type.value}, {r.file_len} bytes)"
+        for r in reqs
+    ]
+    return f"new emoji requests from <@{reqs[0].requester_id}>:\n" + "\n".join(lines)
+
+
+def _format_errors(errors: list[Exception]) -> str:
+    system_errors = [e for e in errors if not isinstance(e, BotUsageError)]
+    if system_errors:
+        logger.warning("Unexpected errors occurred in 1 or more emoji requests")
+    for e in system_errors:
+        logger.debug(
+            f"\nEmoji request error:\n{''.join(traceback.format_exception(e))}"
+        )
+
+    return "".join(
+        f"\n- {str(e) if isinstance(e, BotUsageError) else SOMETHING_WRONG}"
+        for e in errors
+    )
+
+
+def _get_pending_request(request_id: int) -> EmojiRequest:
+    """Looks up an emoji request, ensuring it hasn't been resolved yet"""
+    emoji_request = EmojiRequestStore().get(request_id)
+    if not emoji_request:
+        raise BotUsageError("emoji request could not be found")
+    if emoji_request.status != EmojiRequestStatus.PENDING:
+        raise BotUsageError(f"emoji request was already {emoji_request.status.value}")
+    return emoji_request
+
+
+async def _get_request_context(
+    client: discord.Client, req: EmojiRequest
+) -> tuple[discord.Guild, discord.abc.Messageable, discord.Member]:
+    """Resolves the guild, channel and requester of an emoji request, preferring
+    the client's cache over api calls"""
+    guild = client.get_guild(CONFIG.GUILD_ID)
+    channel = await get_or_fetch_channel(client, req.channel_id)
+    if not guild or not is_messagable(channel):
+        raise BotUsageError("unable to find the channel of the emoji request")
+
+    try:
+        requester = await get_or_fetch_member(guild, req.requester_id)
+    except discord.NotFound as e:
+        raise BotUsageError("emoji requester is no longer in the server") from e
+
+    return guild, channel, requester
+
+
+def _claim_request(req: EmojiRequest) -> bool:
+    """Marks a pending request as being approved, so it can't be approved or
+    denied again while the emoji is created. Returns False if it was already
+    claimed or resolved."""
+    return req.id is not None and EmojiRequestStore().resolve(
+        req.id, EmojiRequestStatus.APPROVING
+    )
+
+
+async def _approve_emoji(client: discord.Client, req: EmojiRequest) -> None:
+    """Creates the emoji for a request claimed with `_claim_request`, and notifies
+    the requester. The request is returned to pending if the emoji can't be
+    created."""
+    if req.id is None:
+        raise ValueError("emoji request must be claimed before it's approved")
+
+    store = EmojiRequestStore()
+    try:
+        guild, channel, requester = await _get_request_context(client, req)
+        image_data = await _download_emoji_image(req.url)
+
+        emoji = await guild.create_custom_emoji(
+            name=req.shortcut or "BADNAME",
+            image=image_data,
+            reason=f"Created by {requester.display_name} via bot commands",
+        )
+    except BaseException:
+        store.resolve(
+            req.id, EmojiRequestStatus.PENDING, current=EmojiRequestStatus.APPROVING
+        )
+        raise
+
+    store.resolve(
+        req.id, EmojiRequestStatus.APPROVED, current=EmojiRequestStatus.APPROVING
+    )
+
+    await channel.send(f"{requester.mention} emoji {emoji} was created")
+
+
+async def _download_emoji_image(url: str) -> bytes:
+    """Downloads the image, and shrinks it to fit the emoji size limit"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        src = Path(tmp_dir) / "source"
+        try:
+            await download_image(url, src, max_size=MAX_EMOJI_SOURCE_SIZE)
+            return await run_in_process(
+                shrink_image_to_size, str(src), MAX_EMOJI_FILE_SIZE
+            )
+        except ValueError as e:
+            raise BotUsageError(f"unable to convert image to an emoji: {e}") from e
 
 
 def is_valid_emoji_type(_type: ImageType) -> bool:
@@ -379,5 +567,5 @@ def get_images_from_msg(
 
 
 async def setup(bot: commands.Bot) -> None:
-    bot.add_view(_EmojiApprovalView())
+    bot.add_dynamic_items(ApproveEmojiButton, DenyEmojiButton, ApproveAllEmojiButton)
     await bot.add_cog(EmojiExtension(bot))
@@ -1,6 +1,10 @@
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cached_property
+import itertools
 import logging
+import typing
 
 import discord
 from discord import app_commands
@@ -8,37 +12,60 @@ from discord.ext import commands
 
 from peanuts_bot.config import CONFIG
 from peanuts_bot.errors import BotUsageError
+from peanuts_bot.extensions.internals.lazy import LazyExtensions
 from peanuts_bot.extensions.internals.protocols import HelpCmdProto
+from peanuts_bot.libraries.text_index import TextIndex
 
 __all__ = ["HelpExtension"]
 
 logger = logging.getLogger(__name__)
 
+MAX_AUTOCOMPLETE_CHOICES = 25
+
 
 class HelpExtension(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        self._catalog: HelpCatalog | None = None
+
+    def get_catalog(self) -> "HelpCatalog":
+        """Returns the help pages for every command, building them if the catalog
+        was invalidated"""
+        if self._catalog is None:
+            guild = discord.Object(CONFIG.GUILD_ID)
+            self._catalog = HelpCatalog.from_commands(
+                self.bot.tree.get_commands(guild=guild),
+                LazyExtensions().get_unloaded_commands(),
+            )
+            logger.debug(f"built help catalog with {len(self._catalog.pages)} pages")
+        return self._catalog
+
+    @commands.Cog.listener("on_tree_synced")
+    async def build_catalog(self) -> None:
+        self._catalog = None
+        self.get_catalog()
+
+    @commands.Cog.listener("on_extensions_changed")
+    async def invalidate_catalog(self) -> None:
+        self._catalog = None
 
     @staticmethod
     def get_help_color() -> discord.Color:
         return discord.Color.from_str("#2C3E50")
 
     @app_commands.command(name="help")
-    async def help(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(query="A command to jump straight to")
+    async def help(
+        self, interaction: discord.Interaction, query: str | None = None
+    ) -> None:
         """See help information for all commands"""
 
         if not isinstance(interaction.user, discord.Member):
             raise BotUsageError("this command is only available in guilds")
 
-        skip_admin_help = not interaction.user.guild_permissions.administrator
-
-        guild = discord.Object(CONFIG.GUILD_ID)
-        all_commands = self.bot.tree.get_commands(guild=guild)
-
-        pages: list[HelpPage] = []
-        for cmd in all_commands:
-            pages.extend(_pages_for_tree_command(cmd, ignore_admin=skip_admin_help))
-        pages.sort(key=lambda p: p.sort_order)
+        is_admin = interaction.user.guild_permissions.administrator
+        catalog = self.get_catalog()
+        pages = catalog.get_pages(admin=is_admin)
 
         if not pages:
             await interaction.response.send_message(
@@ -46,11 +73,31 @@ class HelpExtension(commands.Cog):
             )
             return
 
-        embeds = [p.to_embed() for p in pages]
-        view = HelpPaginator(embeds)
+        current = 0
+        if query:
+            found = catalog.find_page(query, admin=is_admin)
+            if found is None:
+                raise BotUsageError(f"No commands found matching '{query}'")
+            current = found
+
+        view = HelpPaginator(pages, current)
         await interaction.response.send_message(
-            embed=embeds[0], view=view, ephemeral=True
+            embed=view.current_page.embed, view=view, ephemeral=True
+        )
+
+    @help.autocomplete("query")
+    async def help_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        is_admin = (
+            isinstance(interaction.user, discord.Member)
+            and interaction.user.guild_permissions.administrator
         )
+        titles = self.get_catalog().search_titles(current, admin=is_admin)
+        return [
+            app_commands.Choice(name=t[:100], value=t[:100])
+            for t in itertools.islice(titles, MAX_AUTOCOMPLETE_CHOICES)
+        ]
 
 
 class SortOrder(int, Enum):
@@ -73,26 +120,103 @@ class HelpPage:
             embed.add_field(name=field_name, value=field_value)
         return embed
 
+    @cached_property
+    def embed(self) -> discord.Embed:
+        """The page as an embed, rendered the first time it's shown"""
+        return self.to_embed()
+
+
+class HelpCatalog:
+    """The help pages for every command, along with a search index over them"""
+
+    admin_pages: tuple[HelpPage, ...]
+    """the pages visible to admins, which include admin-only commands"""
+
+    pages: tuple[HelpPage, ...]
+    """the pages visible to every member"""
+
+    def __init__(self, pages: list[HelpPage]) -> None:
+        self.admin_pages = tuple(pages)
+        self.pages = tuple(
+            p for p in pages if p.sort_order != SortOrder.SLASH_ADMIN_CMD
+        )
+
+        self._admin_page_numbers = {p.title: i for i, p in enumerate(self.admin_pages)}
+        self._page_numbers = {p.title: i for i, p in enumerate(self.pages)}
+        self._search: TextIndex[str] = TextIndex()
+        for p in self.admin_pages:
+            self._search.add(p.title, f"{p.title.lstrip('/')} {p.desc.strip('`')}")
+
+    @staticmethod
+    def from_commands(
+        cmds: list[
+            app_commands.Command | app_commands.Group | app_commands.ContextMenu
+        ],
+        unloaded: Sequence[tuple[dict[str, typing.Any], int]] = (),
+    ) -> "HelpCatalog":
+        """Builds the catalog from the tree's commands, along with the payloads
+        and help colors of commands whose extension isn't loaded yet"""
+        pages: list[HelpPage] = []
+        for cmd in cmds:
+            pages.extend(_pages_for_tree_command(cmd, ignore_admin=False))
+        for payload, color in unloaded:
+            pages.extend(_pages_for_command_payload(payload, discord.Color(color)))
+        pages.sort(key=lambda p: p.sort_order)
+        return HelpCatalog(pages)
+
+    def get_pages(self, *, admin: bool) -> tuple[HelpPage, ...]:
+        """Returns the pages visible to admins, or to every member"""
+        return self.admin_pages if admin else self.pages
+
+    def search_titles(self, query: str, *, admin: bool) -> Iterator[str]:
+        """Yields the titles of the visible pages matching the query, best
+        matches first"""
+        page_numbers = self._admin_page_numbers if admin else self._page_numbers
+        return (t for t in self._search.search(query.lstrip("/")) if t in page_numbers)
+
+    def find_page(self, query: str, *, admin: bool) -> int | None:
+        """Returns the number of the visible page that best matches the query"""
+        page_numbers = self._admin_page_numbers if admin else self._page_numbers
+        if query in page_numbers:
+            return page_numbers[query]
+
+        title = next(self.search_titles(query, admin=admin), None)
+        return page_numbers[title] if title is not None else None
+
 
 class HelpPaginator(discord.ui.View):
-    def __init__(self, pages: list[discord.Embed], *, timeout: float = 300) -> None:
+    MAX_OPTIONS = 25
+
+    def __init__(
+        self, pages: Sequence[HelpPage], current: int = 0, *, timeout: float = 300
+    ) -> None:
         super().__init__(timeout=timeout)
         self.pages = pages
-        self.current = 0
+        self.current = current
         self._update_buttons()
 
+    @property
+    def current_page(self) -> HelpPage:
+        return self.pages[self.current]
+
     def _update_buttons(self) -> None:
         self.prev_btn.disabled = self.current == 0
         self.next_btn.disabled = self.current == len(self.pages) - 1
+
+        # only list the pages around the current one, since selects are capped
+        start = max(0, self.current - self.MAX_OPTIONS // 2)
+        start = min(start, max(0, len(self.pages) - self.MAX_OPTIONS))
+        end = min(len(self.pages), start + self.MAX_OPTIONS)
+
         select: discord.ui.Item = self.page_select
         if isinstance(select, discord.ui.Select):
             select.options = [
                 discord.SelectOption(
-                    label=(p.title or f"Page {i + 1}")[:100],
+                    label=(self.pages[i].title or f"Page {i + 1}")[:100],
                     value=str(i),
                     default=(i == self.current),
                 )
-                for i, p in enumerate(self.pages)
+                for i in range(start, end)
             ]
 
     @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
@@ -102,7 +226,7 @@ class HelpPaginator(discord.ui.View):
         self.current = max(0, self.current - 1)
         self._update_buttons()
         await interaction.response.edit_message(
-            embed=self.pages[self.current], view=self
+            embed=self.current_page.embed, view=self
         )
 
     @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
@@ -112,7 +236,7 @@ class HelpPaginator(discord.ui.View):
         self.current = min(len(self.pages) - 1, self.current + 1)
         self._update_buttons()
         await interaction.response.edit_message(
-            embed=self.pages[self.current], view=self
+            embed=self.current_page.embed, view=self
         )
 
     @discord.ui.select(placeholder="Jump to a command...")
@@ -122,7 +246,7 @@ class HelpPaginator(discord.ui.View):
         self.current = int(select.values[0])
         self._update_buttons()
         await interaction.response.edit_message(
-            embed=self.pages[self.current], view=self
+            embed=self.current_page.embed, view=self
         )
 
 
@@ -200,5 +324,72 @@ def _pages_for_tree_command(
     ]
 
 
+def _pages_for_command_payload(
+    payload: dict[str, typing.Any],
+    color: discord.Color,
+    *,
+    parents: tuple[str, ...] = (),
+    is_admin_cmd: bool | None = None,
+) -> list[HelpPage]:
+    """Builds the help pages of a command from its sync payload, for commands
+    whose extension isn't loaded yet"""
+    cmd_type = payload.get("type", discord.AppCommandType.chat_input.value)
+    if cmd_type != discord.AppCommandType.chat_input.value:
+        type_label = (
+            "messages" if cmd_type == discord.AppCommandType.message.value else "users"
+        )
+        return [
+            HelpPage(
+                title=payload["name"],
+                desc=f"Available in right click context menus on {type_label}",
+                color=color,
+                sort_order=SortOrder.CONTEXT_MENU,
+            )
+        ]
+
+    if is_admin_cmd is None:
+        perms = payload.get("default_member_permissions")
+        is_admin_cmd = (
+            perms is not None and discord.Permissions(int(perms)).administrator
+        )
+
+    options = payload.get("options", [])
+    name_parts = (*parents, payload["name"])
+    subcommand_types = (
+        discord.AppCommandOptionType.subcommand.value,
+        discord.AppCommandOptionType.subcommand_group.value,
+    )
+    if any(opt["type"] in subcommand_types for opt in options):
+        pages: list[HelpPage] = []
+        for opt in options:
+            pages.extend(
+                _pages_for_command_payload(
+                    opt, color, parents=name_parts, is_admin_cmd=is_admin_cmd
+                )
+            )
+        return pages
+
+    cmd_args: list[tuple[str, str]] = []
+    for opt in options:
+        type_name = discord.AppCommandOptionType(opt["type"]).name.lower()
+        if opt.get("required", False):
+            field_name = f"{opt['name']} (_{type_name}_)"
+        else:
+            field_name = f"{opt['name']} (_{type_name}_, optional)"
+        cmd_args.append((field_name, opt.get("description", "")))
+
+    return [
+        HelpPage(
+            title=f"/{' '.join(name_parts)}",
+            desc=f"```{payload.get('description', '')}```",
+            args=cmd_args,
+            color=color,
+            sort_order=SortOrder.SLASH_CMD
+            if not is_admin_cmd
+            else SortOrder.SLASH_ADMIN_CMD,
+        )
+    ]
+
+
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(HelpExtension(bot))
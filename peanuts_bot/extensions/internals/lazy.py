@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import json
+import logging
+from pathlib import Path
+import typing
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import peanuts_bot
+from peanuts_bot.config import CONFIG
+from peanuts_bot.extensions import ExtInfo
+from peanuts_bot.extensions.internals import REQUIRED_EXTENSION_PROTOS
+from peanuts_bot.extensions.internals.protocols import HelpCmdProto
+from peanuts_bot.libraries.discord.command_sync import sync_command_tree
+
+
+logger = logging.getLogger(__name__)
+
+COMMAND_MANIFEST_PATH = Path(CONFIG.DATA_DIR) / "command_manifest.json"
+"""where the commands registered by each lazy extension are recorded"""
+
+
+class ManifestEntry(typing.TypedDict):
+    commands: list[dict[str, typing.Any]]
+    """the sync payloads of the commands the extension registers"""
+
+    help_color: int
+    """the help color of the extension's cog"""
+
+
+def get_source_hash() -> str:
+    """Returns a hash of the bot's source code, which changes on every deploy that
+    could change the commands an extension registers"""
+    digest = hashlib.sha256()
+    package_dir = Path(peanuts_bot.__file__).parent
+    for path in sorted(package_dir.rglob("*.py")):
+        digest.update(str(path.relative_to(package_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _command_key(payload: dict[str, typing.Any]) -> tuple[str, int]:
+    return payload["name"], payload.get("type", 1)
+
+
+class LazyExtensions:
+    """A global registry of extensions that are only loaded the first time one of
+    their commands is used.
+
+    The commands each lazy extension registers are recorded in a manifest, so
+    they can be synced and listed in help without importing the extension. The
+    manifest is rebuilt whenever the bot's source changes.
+
+    Lazy extensions must only register app commands; components and listeners
+    are not available until the extension is loaded.
+
+    To use, the registry must first be initialized during application bootup
+
+    ```python
+    LazyExtensions.init(bot, lazy_extensions)
+    await LazyExtensions().prepare()
+    ```
+
+    Then before handling an interaction, do the following:
+
+    ```python
+    await LazyExtensions().load_for_interaction(interaction)
+    ```
+    """
+
+    _bot: commands.Bot
+    _extensions: list[ExtInfo]
+    _manifest: dict[str, ManifestEntry]
+    _manifest_path: Path
+    _commands: dict[tuple[str, int], str]
+    _locks: dict[str, asyncio.Lock]
+
+    _instance: typing.ClassVar["LazyExtensions | None"] = None
+    __init_flag: typing.ClassVar[bool] = False
+
+    def __new__(cls) -> "LazyExtensions":
+        if cls.__init_flag:
+            cls._instance = super().__new__(cls)
+            cls.__init_flag = False
+
+        if not cls._instance:
+            raise RuntimeError(
+                "LazyExtensions must first be initialized by calling `init`"
+            )
+
+        return cls._instance
+
+    @classmethod
+    def init(
+        cls,
+        bot: commands.Bot,
+        extensions: list[ExtInfo],
+        manifest_path: Path = COMMAND_MANIFEST_PATH,
+    ) -> None:
+        """Initialize the LazyExtensions registry"""
+        cls.__init_flag = True
+        registry = cls()
+        registry._bot = bot
+        registry._extensions = extensions
+        registry._manifest = {}
+        registry._manifest_path = manifest_path
+        registry._commands = {}
+        registry._locks = {}
+
+    async def prepare(self) -> None:
+        """Loads the command manifest, rebuilding it if it is missing or stale.
+
+        Rebuilding the manifest loads every lazy extension.
+        """
+        source_hash = get_source_hash()
+        try:
+            saved = json.loads(self._manifest_path.read_text())
+        except (OSError, ValueError):
+            saved = {}
+
+        extensions = saved.get("extensions", {})
+        stale = saved.get("source_hash") != source_hash or any(
+            e.module_path not in extensions for e in self._extensions
+        )
+        if stale:
+            logger.info("command manifest is stale, loading lazy extensions")
+            extensions = {
+                e.module_path: await self.__record(e) for e in self._extensions
+            }
+            self.__save(source_hash, extensions)
+
+        self._manifest = extensions
+        self._commands = {
+            _command_key(c): module_path
+            for module_path, entry in extensions.items()
+            for c in entry["commands"]
+        }
+
+    def is_loaded(self, module_path: str) -> bool:
+        return module_path in self._bot.extensions
+
+    def get_unloaded_commands(self) -> list[tuple[dict[str, typing.Any], int]]:
+        """Returns the sync payloads of the commands of every lazy extension that
+        isn't loaded yet, along with the help color of their extension"""
+        return [
+            (c, entry["help_color"])
+            for module_path, entry in self._manifest.items()
+            if not self.is_loaded(module_path)
+            for c in entry["commands"]
+        ]
+
+    async def load(self, module_path: str) -> None:
+        """Loads the lazy extension, if it isn't loaded yet"""
+        lock = self._locks.setdefault(module_path, asyncio.Lock())
+        async with lock:
+            if self.is_loaded(module_path):
+                return
+            logger.info(f"loading {module_path} on first use")
+            await self._bot.load_extension(module_path)
+            # copied before yielding to the loop, so the extensions_changed
+            # listeners (e.g. the help catalog) see the guild's new commands
+            self._bot.tree.copy_global_to(guild=discord.Object(id=CONFIG.GUILD_ID))
+
+    async def load_all(self) -> None:
+        """Loads every lazy extension"""
+        for ext in self._extensions:
+            await self.load(ext.module_path)
+
+    async def load_for_interaction(self, interaction: discord.Interaction) -> None:
+        """Loads the lazy extension that owns the command of the interaction, if any"""
+        if interaction.type not in (
+            discord.InteractionType.application_command,
+            discord.InteractionType.autocomplete,
+        ):
+            return
+
+        data = typing.cast(dict[str, typing.Any], interaction.data)
+        if module_path := self._commands.get(_command_key(data)):
+            await self.load(module_path)
+
+    async def __record(self, ext: ExtInfo) -> ManifestEntry:
+        tree = self._bot.tree
+        existing = {_command_key(c.to_dict(tree)) for c in tree.get_commands()}
+        existing_cogs = set(self._bot.cogs)
+
+        await self.load(ext.module_path)
+
+        cmds = [
+            payload
+            for payload in (c.to_dict(tree) for c in tree.get_commands())
+            if _command_key(payload) not in existing
+        ]
+        help_color = 0
+        for name in set(self._bot.cogs) - existing_cogs:
+            cog = self._bot.cogs[name]
+            for proto in REQUIRED_EXTENSION_PROTOS:
+                if not isinstance(cog, proto):
+                    raise RuntimeError(
+                        f"{cog.__class__.__name__} does not implement {proto.__name__}"
+                    )
+            if isinstance(cog, HelpCmdProto):
+                help_color = cog.get_help_color().value
+
+        return ManifestEntry(commands=cmds, help_color=help_color)
+
+    def __save(self, source_hash: str, extensions: dict[str, ManifestEntry]) -> None:
+        try:
+            self._manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            self._manifest_path.write_text(
+                json.dumps({"source_hash": source_hash, "extensions": extensions})
+            )
+        except OSError:
+            logger.warning("failed to save the command manifest", exc_info=True)
+
+
+async def sync_commands(
+    bot: commands.Bot, *, force: bool = False
+) -> list[app_commands.AppCommand] | None:
+    """Syncs the commands of the main guild, including the commands of lazy
+    extensions that aren't loaded yet.
+
+    If a sync is needed, the lazy extensions are loaded first so their commands
+    are part of the tree. Returns the synced commands, or None if the commands
+    were unchanged.
+    """
+    lazy = LazyExtensions()
+    guild = discord.Object(id=CONFIG.GUILD_ID)
+    bot.tree.copy_global_to(guild=guild)
+
+    async def _load_lazy_commands() -> None:
+        await lazy.load_all()
+        bot.tree.copy_global_to(guild=guild)
+
+    return await sync_command_tree(
+        bot.tree,
+        guild,
+        force=force,
+        unloaded_commands=[c for c, _ in lazy.get_unloaded_commands()],
+        before_sync=_load_lazy_commands,
+    )
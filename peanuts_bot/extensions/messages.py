@@ -9,11 +9,13 @@ from discord.ext import commands
 
 from peanuts_bot.config import CONFIG
 from peanuts_bot.errors import BotUsageError, handle_interaction_error
+from peanuts_bot.libraries.discord.message_cache import MessageResolver
+from peanuts_bot.libraries.discord.message_rules import MessageRule, MessageRuleEngine
 from peanuts_bot.libraries.discord.messaging import (
-    BAD_TWITTER_LINKS,
+    DISCORD_MSG_URL_REGEX,
+    LINK_REWRITES,
     DiscordMesageLink,
-    get_discord_msg_links,
-    is_messagable,
+    discord_msg_link_from_match,
     parse_discord_msg_link,
 )
 
@@ -68,16 +70,18 @@ async def _create_quote_embed(msg: discord.Message) -> discord.Embed:
 
 
 async def _get_discord_msg(
-    link: DiscordMesageLink, client: discord.Client
+    link: DiscordMesageLink, resolver: MessageResolver
 ) -> discord.Message:
     if link.guild_id != CONFIG.GUILD_ID:
         raise BotUsageError("Cannot quote messages from other servers")
 
-    ch = await client.fetch_channel(link.channel_id)
-    if not is_messagable(ch):
-        raise BotUsageError("Message could not be found")
+    return await resolver.resolve(link)
 
-    return await ch.fetch_message(link.message_id)
+
+def _mentions_league_role(msg: discord.Message) -> bool:
+    return bool(CONFIG.LEAGUE_ROLE_ID) and any(
+        r.id == CONFIG.LEAGUE_ROLE_ID for r in msg.role_mentions
+    )
 
 
 async def _league_ping_players(
@@ -299,19 +303,76 @@ class MessageExtension(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        self.resolver = MessageResolver(bot)
+        self._prewarmed = False
+        self.rules = MessageRuleEngine(
+            [
+                MessageRule(
+                    name="auto_quote",
+                    handler=self.auto_quote,
+                    pattern=DISCORD_MSG_URL_REGEX,
+                    hints=("discord.com/channels/",),
+                ),
+                MessageRule(
+                    name="auto_rewrite_links",
+                    handler=self.auto_rewrite_links,
+                    pattern="|".join(re.escape(link) for link in LINK_REWRITES),
+                    hints=tuple(LINK_REWRITES),
+                ),
+                MessageRule(
+                    name="send_league_ping_check",
+                    handler=self.send_league_ping_check,
+                    predicate=_mentions_league_role,
+                ),
+            ]
+        )
 
     @staticmethod
     def get_help_color() -> discord.Color:
         return discord.Color.from_str("#ECF0F1")
 
+    @commands.Cog.listener("on_ready")
+    async def prewarm_message_cache(self) -> None:
+        guild = self.bot.get_guild(CONFIG.GUILD_ID)
+        if self._prewarmed or not guild:
+            return
+
+        self._prewarmed = True
+        await self.resolver.prewarm(guild, channels=3, limit=50)
+
+    @commands.Cog.listener("on_raw_message_edit")
+    async def invalidate_edited_message(
+        self, payload: discord.RawMessageUpdateEvent
+    ) -> None:
+        self.resolver.invalidate(payload.message_id)
+
+    @commands.Cog.listener("on_raw_message_delete")
+    async def invalidate_deleted_message(
+        self, payload: discord.RawMessageDeleteEvent
+    ) -> None:
+        self.resolver.invalidate(payload.message_id)
+
+    @commands.Cog.listener("on_raw_bulk_message_delete")
+    async def invalidate_deleted_messages(
+        self, payload: discord.RawBulkMessageDeleteEvent
+    ) -> None:
+        for message_id in payload.message_ids:
+            self.resolver.invalidate(message_id)
+
     @commands.Cog.listener("on_message")
-    async def auto_quote(self, msg: discord.Message) -> None:
+    async def on_message(self, msg: discord.Message) -> None:
         if msg.guild and msg.guild.id != CONFIG.GUILD_ID:
             return
 
-        for url in get_discord_msg_links(msg.content):
+        await self.rules.dispatch(msg)
+
+    async def auto_quote(
+        self, msg: discord.Message, matches: list[re.Match[str]]
+    ) -> None:
+        for match in matches:
+            url = discord_msg_link_from_match(match)
             try:
-                quoted_msg = await _get_discord_msg(url, self.bot)
+                quoted_msg = await _get_discord_msg(url, self.resolver)
             except BotUsageError:
                 logger.debug(
                     "url regex found match but could not fetch message from the url",
@@ -328,34 +389,19 @@ class MessageExtension(commands.Cog):
             await msg.reply(embed=await _create_quote_embed(quoted_msg))
             return
 
-    @commands.Cog.listener("on_message")
-    async def auto_fix_twitter_links(self, msg: discord.Message) -> None:
-        if msg.guild and msg.guild.id != CONFIG.GUILD_ID:
-            return
-
-        if not any(bad_link in msg.content for bad_link in BAD_TWITTER_LINKS):
-            return
-
-        new_content = f"Message with fixed Twitter links:\n{msg.content}".replace(
-            "\n", "\n> "
-        )
-        for link in BAD_TWITTER_LINKS:
-            new_content = new_content.replace(link, "https://fxtwitter.com")
+    async def auto_rewrite_links(
+        self, msg: discord.Message, matches: list[re.Match[str]]
+    ) -> None:
+        new_content = f"Message with fixed links:\n{msg.content}".replace("\n", "\n> ")
+        for link, replacement in LINK_REWRITES.items():
+            new_content = new_content.replace(link, replacement)
 
         await msg.reply(content=new_content)
         await msg.edit(suppress=True)
 
-    @commands.Cog.listener("on_message")
-    async def send_league_ping_check(self, msg: discord.Message) -> None:
-        if not CONFIG.LEAGUE_ROLE_ID:
-            return
-
-        if msg.guild and msg.guild.id != CONFIG.GUILD_ID:
-            return
-
-        if not any(r.id == CONFIG.LEAGUE_ROLE_ID for r in msg.role_mentions):
-            return
-
+    async def send_league_ping_check(
+        self, msg: discord.Message, matches: list[re.Match[str]]
+    ) -> None:
         options = _LeagueOptions.get_dropdown_options()
         content = "\n".join(f"{o.emoji} {o.label}:" for o in options)
 
@@ -394,7 +440,7 @@ class MessageExtension(commands.Cog):
         if not parsed_link:
             raise BotUsageError("Must provide a discord message link")
 
-        message = await _get_discord_msg(parsed_link, interaction.client)
+        message = await _get_discord_msg(parsed_link, self.resolver)
         await interaction.response.send_message(
             embed=await _create_quote_embed(message)
         )
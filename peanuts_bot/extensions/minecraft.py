@@ -2,21 +2,22 @@ import asyncio
 import enum
 import logging
 import shlex
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
-import aiohttp
 import async_lru
 import discord
 from discord import app_commands
 from discord.ext import commands
-import mcstatus
-from mcstatus.status_response import JavaStatusResponse
 
 from peanuts_bot.config import MC_CONFIG
 from peanuts_bot.errors import BotUsageError
-from peanuts_bot.libraries.discord.admin import send_error_to_admin
+from peanuts_bot.libraries.discord.admin import report_error_to_admin
+from peanuts_bot.libraries.http_client import HttpClient
 from peanuts_bot.libraries.image import decode_b64_image
 
+if TYPE_CHECKING:
+    from mcstatus.status_response import JavaStatusResponse
+
 __all__ = ["MinecraftExtension"]
 
 logger = logging.getLogger(__name__)
@@ -44,6 +45,8 @@ class MinecraftExtension(commands.Cog):
     async def mc_status(self, interaction: discord.Interaction) -> None:
         """Get the info and status of the Peanuts Minecraft server"""
 
+        import mcstatus
+
         status: Literal[_SENTINEL._UNKNOWN] | JavaStatusResponse | None = _UNKNOWN
         try:
             server = await mcstatus.JavaServer.async_lookup(CONFIG.MC_SERVER_IP)
@@ -52,7 +55,7 @@ class MinecraftExtension(commands.Cog):
             status = None
         except Exception as e:
             logger.exception("unknown error while getting server status")
-            await send_error_to_admin(e, interaction.client)
+            report_error_to_admin(e)
 
         server_address_field = (
             "Server Address",
@@ -148,15 +151,14 @@ class MinecraftExtension(commands.Cog):
 async def get_minecraft_user(name: str) -> str | None:
     """Returns the proper name for a Minecraft user, or None if not found"""
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            f"https://api.mojang.com/users/profiles/minecraft/{name}"
-        ) as resp:
-            if resp.status >= 400:
-                return None
+    async with HttpClient().request(
+        "GET", f"https://api.mojang.com/users/profiles/minecraft/{name}"
+    ) as resp:
+        if resp.status >= 400:
+            return None
 
-            data = await resp.json()
-            return data.get("name", None)
+        data = await resp.json()
+        return data.get("name", None)
 
 
 async def _whitelist_user(username: str, operation: Literal["add", "remove"]) -> bool:
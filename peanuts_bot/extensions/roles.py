@@ -1,12 +1,19 @@
+import itertools
 import logging
-from collections.abc import AsyncGenerator, Callable, Iterator
-from typing import NamedTuple
+import math
+import re
+from collections.abc import AsyncGenerator, Callable, Collection, Iterable, Iterator
+from typing import Any, Literal, NamedTuple, cast
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from peanuts_bot.errors import BotUsageError, handle_interaction_error
+from peanuts_bot.libraries.discord.role_index import (
+    JoinableRoleIndex,
+    is_joinable_role,
+)
 
 __all__ = ["RoleExtension"]
 
@@ -15,16 +22,19 @@ logger = logging.getLogger(__name__)
 ROLE_JOIN_ID = "role_join"
 ROLE_LEAVE_ID = "role_leave"
 
+ROLES_PER_PAGE = 25
+MAX_AUTOCOMPLETE_CHOICES = 25
+
+_PAGE_BUTTON_TEMPLATE = r"role_page:(?P<action>join|leave):(?P<page>[0-9]+)"
+
+RoleAction = Literal["join", "leave"]
+
 
 class RoleOptionTuple(NamedTuple):
     id: int
     name: str
 
 
-def _is_joinable(r: discord.Role) -> bool:
-    return r.mentionable and r.permissions == discord.Permissions.none()
-
-
 def _get_role_option_value(role: discord.Role) -> str:
     return f"{role.id}|{role.name}"
 
@@ -54,7 +64,7 @@ async def _get_valid_roles(
             )
             continue
 
-        if not _is_joinable(role):
+        if not is_joinable_role(role):
             logger.debug(f"{role_name} is not a joinable role. Skipping...")
             invalid_role_callback(role_name)
             continue
@@ -62,21 +72,208 @@ async def _get_valid_roles(
         yield role
 
 
+async def _edit_member_roles(
+    member: discord.Member,
+    *,
+    add: Collection[discord.Role] = (),
+    remove: Collection[discord.Role] = (),
+    reason: str,
+) -> None:
+    """Applies all of the role changes to the member in a single api call"""
+    roles = (set(member.roles) | set(add)) - set(remove)
+    roles.discard(member.guild.default_role)
+    await member.edit(roles=list(roles), reason=reason)
+
+
+async def _join_roles(
+    guild: discord.Guild,
+    member: discord.Member,
+    selected_roles: Iterable[RoleOptionTuple],
+) -> str:
+    """Adds the member to the selected roles, and describes the outcome"""
+    invalid_roles: list[str] = []
+    joined_roles: list[discord.Role] = []
+
+    async for role in _get_valid_roles(
+        selected_roles=iter(selected_roles),
+        guild=guild,
+        member=member,
+        should_skip=lambda m, r: r in m.roles,
+        invalid_role_callback=invalid_roles.append,
+    ):
+        logger.debug(f"{member.display_name} attempting to join {role.name}")
+        joined_roles.append(role)
+
+    if joined_roles:
+        try:
+            await _edit_member_roles(
+                member,
+                add=joined_roles,
+                reason=f"{member.display_name} joined role via join command",
+            )
+        except discord.HTTPException:
+            logger.warning(
+                f"failed to add roles for {member.display_name}", exc_info=True
+            )
+            invalid_roles.extend(r.name for r in joined_roles)
+            joined_roles = []
+
+    parts = []
+    if joined_roles:
+        parts.append(f"Successfully joined {', '.join(r.name for r in joined_roles)}")
+    if invalid_roles:
+        parts.append(f"Failed to join {', '.join(invalid_roles)}.")
+    if not parts:
+        parts.append("No changes were made.")
+    return "\n".join(parts)
+
+
+async def _leave_roles(
+    guild: discord.Guild,
+    member: discord.Member,
+    selected_roles: Iterable[RoleOptionTuple],
+) -> str:
+    """Removes the member from the selected roles, and describes the outcome"""
+    invalid_roles: list[str] = []
+    left_roles: list[discord.Role] = []
+
+    async for role in _get_valid_roles(
+        selected_roles=iter(selected_roles),
+        guild=guild,
+        member=member,
+        should_skip=lambda m, r: r not in m.roles,
+        invalid_role_callback=invalid_roles.append,
+    ):
+        logger.debug(f"{member.display_name} attempting to leave {role.name}")
+        left_roles.append(role)
+
+    if left_roles:
+        try:
+            await _edit_member_roles(
+                member,
+                remove=left_roles,
+                reason=f"{member.display_name} left role via leave command",
+            )
+        except discord.HTTPException:
+            logger.warning(
+                f"failed to remove roles for {member.display_name}", exc_info=True
+            )
+            invalid_roles.extend(r.name for r in left_roles)
+            left_roles = []
+
+    parts = []
+    if left_roles:
+        parts.append(f"Successfully left {', '.join(r.name for r in left_roles)}")
+    if invalid_roles:
+        parts.append(f"Failed to leave {', '.join(invalid_roles)}.")
+    if not parts:
+        parts.append("No changes were made.")
+    return "\n".join(parts)
+
+
+class RolePageButton(
+    discord.ui.DynamicItem[discord.ui.Button], template=_PAGE_BUTTON_TEMPLATE
+):
+    """Switches a role picker to another page of roles"""
+
+    def __init__(
+        self, action: RoleAction, page: int, label: str = "", disabled: bool = False
+    ):
+        super().__init__(
+            discord.ui.Button(
+                label=label or f"Page {page + 1}",
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"role_page:{action}:{page}",
+                disabled=disabled,
+            )
+        )
+        self.action = action
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: discord.Interaction,
+        item: discord.ui.Item[Any],
+        match: re.Match[str],
+    ) -> "RolePageButton":
+        return cls(cast(RoleAction, match["action"]), int(match["page"]))
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        try:
+            if not interaction.guild or not isinstance(
+                interaction.user, discord.Member
+            ):
+                raise BotUsageError("This command can only be used in a server")
+
+            client = interaction.client
+            cog = (
+                client.get_cog(RoleExtension.__cog_name__)
+                if isinstance(client, commands.Bot)
+                else None
+            )
+            if not isinstance(cog, RoleExtension):
+                raise BotUsageError("Roles are currently unavailable")
+
+            view = cog.get_role_picker(
+                self.action, interaction.guild, interaction.user, self.page
+            )
+            if not view:
+                raise BotUsageError(f"There are no roles you can {self.action}")
+            await interaction.response.edit_message(view=view)
+        except Exception as e:
+            await handle_interaction_error(interaction, e)
+
+
+def _set_picker_page(
+    view: discord.ui.View, action: RoleAction, roles: list[discord.Role], page: int
+) -> None:
+    """Fills the view's select with a page of the given roles, adding buttons to
+    switch pages if they don't fit on one"""
+    page_count = max(1, math.ceil(len(roles) / ROLES_PER_PAGE))
+    page = min(page, page_count - 1)
+    options = [
+        discord.SelectOption(label=role.name, value=_get_role_option_value(role))
+        for role in roles[page * ROLES_PER_PAGE : (page + 1) * ROLES_PER_PAGE]
+    ]
+
+    for child in view.children:
+        if isinstance(child, discord.ui.Select):
+            child.options = options
+            child.max_values = len(options)
+            if page_count > 1:
+                child.placeholder = (
+                    f"{child.placeholder} (page {page + 1}/{page_count})"
+                )
+            break
+
+    if page_count > 1:
+        view.add_item(
+            RolePageButton(
+                action, max(page - 1, 0), label="Previous", disabled=page == 0
+            )
+        )
+        view.add_item(
+            RolePageButton(
+                action,
+                min(page + 1, page_count - 1),
+                label="Next",
+                disabled=page == page_count - 1,
+            )
+        )
+
+
 class RoleJoinView(discord.ui.View):
-    def __init__(self, options: list[discord.SelectOption] | None = None) -> None:
+    def __init__(self, roles: list[discord.Role] | None = None, page: int = 0) -> None:
         super().__init__(timeout=None)
-        if options is not None:
-            for child in self.children:
-                if isinstance(child, discord.ui.Select):
-                    child.options = options
-                    child.max_values = len(options)
-                    break
+        if roles is not None:
+            _set_picker_page(self, "join", roles, page)
 
     @discord.ui.select(
         custom_id=ROLE_JOIN_ID,
         placeholder="Join a mention role",
         min_values=1,
-        max_values=25,
+        max_values=ROLES_PER_PAGE,
     )
     async def join_selection(
         self, interaction: discord.Interaction, select: discord.ui.Select
@@ -85,33 +282,12 @@ class RoleJoinView(discord.ui.View):
             raise BotUsageError("This command can only be used in a server")
 
         await interaction.response.defer(ephemeral=True)
-        member = interaction.user
-
-        invalid_roles: list[str] = []
-        joined_roles: list[str] = []
-
-        async for role in _get_valid_roles(
-            selected_roles=(_split_role_option_value(v) for v in select.values),
-            guild=interaction.guild,
-            member=member,
-            should_skip=lambda m, r: r in m.roles,
-            invalid_role_callback=invalid_roles.append,
-        ):
-            logger.debug(f"{member.display_name} attempting to join {role.name}")
-            joined_roles.append(role.name)
-            await member.add_roles(
-                role, reason=f"{member.display_name} joined role via join command"
-            )
-
-        parts = []
-        if joined_roles:
-            parts.append(f"Successfully joined {', '.join(joined_roles)}")
-        if invalid_roles:
-            parts.append(f"Failed to join {', '.join(invalid_roles)}.")
-        if not parts:
-            parts.append("No changes were made.")
-
-        await interaction.followup.send("\n".join(parts), ephemeral=True)
+        msg = await _join_roles(
+            interaction.guild,
+            interaction.user,
+            (_split_role_option_value(v) for v in select.values),
+        )
+        await interaction.followup.send(msg, ephemeral=True)
 
     async def on_error(
         self,
@@ -123,20 +299,16 @@ class RoleJoinView(discord.ui.View):
 
 
 class RoleLeaveView(discord.ui.View):
-    def __init__(self, options: list[discord.SelectOption] | None = None) -> None:
+    def __init__(self, roles: list[discord.Role] | None = None, page: int = 0) -> None:
         super().__init__(timeout=None)
-        if options is not None:
-            for child in self.children:
-                if isinstance(child, discord.ui.Select):
-                    child.options = options
-                    child.max_values = len(options)
-                    break
+        if roles is not None:
+            _set_picker_page(self, "leave", roles, page)
 
     @discord.ui.select(
         custom_id=ROLE_LEAVE_ID,
         placeholder="Leave a mention role",
         min_values=1,
-        max_values=25,
+        max_values=ROLES_PER_PAGE,
     )
     async def leave_selection(
         self, interaction: discord.Interaction, select: discord.ui.Select
@@ -145,33 +317,12 @@ class RoleLeaveView(discord.ui.View):
             raise BotUsageError("This command can only be used in a server")
 
         await interaction.response.defer(ephemeral=True)
-        member = interaction.user
-
-        invalid_roles: list[str] = []
-        left_roles: list[str] = []
-
-        async for role in _get_valid_roles(
-            selected_roles=(_split_role_option_value(v) for v in select.values),
-            guild=interaction.guild,
-            member=member,
-            should_skip=lambda m, r: r not in m.roles,
-            invalid_role_callback=invalid_roles.append,
-        ):
-            logger.debug(f"{member.display_name} attempting to leave {role.name}")
-            left_roles.append(role.name)
-            await member.remove_roles(
-                role, reason=f"{member.display_name} left role via leave command"
-            )
-
-        parts = []
-        if left_roles:
-            parts.append(f"Successfully left {', '.join(left_roles)}")
-        if invalid_roles:
-            parts.append(f"Failed to leave {', '.join(invalid_roles)}.")
-        if not parts:
-            parts.append("No changes were made.")
-
-        await interaction.followup.send("\n".join(parts), ephemeral=True)
+        msg = await _leave_roles(
+            interaction.guild,
+            interaction.user,
+            (_split_role_option_value(v) for v in select.values),
+        )
+        await interaction.followup.send(msg, ephemeral=True)
 
     async def on_error(
         self,
@@ -187,6 +338,39 @@ class RoleExtension(commands.Cog):
         name="role", description="Role management commands"
     )
 
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.role_index = JoinableRoleIndex()
+
+    @commands.Cog.listener("on_ready")
+    async def build_role_index(self) -> None:
+        for guild in self.bot.guilds:
+            self.role_index.build(guild)
+
+    @commands.Cog.listener("on_guild_role_create")
+    async def index_new_role(self, role: discord.Role) -> None:
+        self.role_index.add_role(role)
+
+    @commands.Cog.listener("on_guild_role_update")
+    async def reindex_role(self, before: discord.Role, after: discord.Role) -> None:
+        self.role_index.update_role(before, after)
+
+    @commands.Cog.listener("on_guild_role_delete")
+    async def unindex_role(self, role: discord.Role) -> None:
+        self.role_index.remove_role(role)
+
+    @commands.Cog.listener("on_member_update")
+    async def reindex_member(
+        self, before: discord.Member, after: discord.Member
+    ) -> None:
+        if before.roles != after.roles:
+            self.role_index.update_member(after)
+
+    @commands.Cog.listener("on_raw_member_remove")
+    async def unindex_member(self, payload: discord.RawMemberRemoveEvent) -> None:
+        if guild := self.bot.get_guild(payload.guild_id):
+            self.role_index.remove_member(guild, payload.user.id)
+
     @staticmethod
     def get_help_color() -> discord.Color:
         return discord.Color.from_str("#E74C3C")
@@ -198,7 +382,7 @@ class RoleExtension(commands.Cog):
         if not interaction.guild:
             raise BotUsageError("This command can only be used in a server")
 
-        if any(r.name == name for r in interaction.guild.roles):
+        if self.role_index.get_role_by_name(interaction.guild, name):
             raise BotUsageError(f"The role {name} already exists")
 
         role = await interaction.guild.create_role(
@@ -218,7 +402,7 @@ class RoleExtension(commands.Cog):
         if not interaction.guild or not isinstance(interaction.user, discord.Member):
             raise BotUsageError("This command can only be used in a server")
 
-        if not _is_joinable(role):
+        if not is_joinable_role(role):
             raise BotUsageError("You cannot request to delete this role")
 
         if any(m for m in role.members if m.id != interaction.user.id):
@@ -229,44 +413,116 @@ class RoleExtension(commands.Cog):
         )
         await interaction.response.send_message(f"Deleted role '{role.name}'")
 
+    def get_role_picker(
+        self,
+        action: RoleAction,
+        guild: discord.Guild,
+        member: discord.Member,
+        page: int = 0,
+    ) -> discord.ui.View | None:
+        """Builds the select menu for joining or leaving roles at the given page, or
+        None if there are no roles to pick from"""
+        if action == "join":
+            roles = self.role_index.get_joinable_roles(guild, member)
+            return RoleJoinView(roles, page) if roles else None
+
+        roles = self.role_index.get_leavable_roles(guild, member)
+        return RoleLeaveView(roles, page) if roles else None
+
+    def _resolve_role_arg(self, guild: discord.Guild, value: str) -> discord.Role:
+        """Resolves a role argument, which is a role id when picked from the
+        autocomplete suggestions, or a role name when typed out"""
+        role = guild.get_role(int(value)) if value.isdigit() else None
+        role = role or self.role_index.get_role_by_name(guild, value)
+        if not role:
+            raise BotUsageError(f"The role {value} does not exist")
+        return role
+
     @_role_group.command(name="join")
-    async def role_join(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(role="The role to join. Leave blank to pick from a list")
+    async def role_join(
+        self, interaction: discord.Interaction, role: str | None = None
+    ) -> None:
         """Add yourself to a mention role"""
         if not interaction.guild or not isinstance(interaction.user, discord.Member):
             raise BotUsageError("This command can only be used in a server")
 
-        member = interaction.user
-        options = [
-            discord.SelectOption(label=role.name, value=_get_role_option_value(role))
-            for role in interaction.guild.roles
-            if _is_joinable(role) and role not in member.roles
-        ]
-        if not options:
+        if role:
+            picked = self._resolve_role_arg(interaction.guild, role)
+            await interaction.response.defer(ephemeral=True)
+            msg = await _join_roles(
+                interaction.guild,
+                interaction.user,
+                [RoleOptionTuple(picked.id, picked.name)],
+            )
+            await interaction.followup.send(msg, ephemeral=True)
+            return
+
+        view = self.get_role_picker("join", interaction.guild, interaction.user)
+        if not view:
             raise BotUsageError("There are no new roles you can join")
 
-        view = RoleJoinView(options=options)
         await interaction.response.send_message(view=view, ephemeral=True)
 
+    @role_join.autocomplete("role")
+    async def role_join_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        if not interaction.guild or not isinstance(interaction.user, discord.Member):
+            return []
+
+        roles = self.role_index.search_joinable_roles(
+            interaction.guild, interaction.user, current
+        )
+        return [
+            app_commands.Choice(name=r.name, value=str(r.id))
+            for r in itertools.islice(roles, MAX_AUTOCOMPLETE_CHOICES)
+        ]
+
     @_role_group.command(name="leave")
-    async def role_leave(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(role="The role to leave. Leave blank to pick from a list")
+    async def role_leave(
+        self, interaction: discord.Interaction, role: str | None = None
+    ) -> None:
         """Remove yourself from a mention role"""
         if not interaction.guild or not isinstance(interaction.user, discord.Member):
             raise BotUsageError("This command can only be used in a server")
 
-        member = interaction.user
-        options = [
-            discord.SelectOption(label=role.name, value=_get_role_option_value(role))
-            for role in interaction.guild.roles
-            if _is_joinable(role) and role in member.roles
-        ]
-        if not options:
+        if role:
+            picked = self._resolve_role_arg(interaction.guild, role)
+            await interaction.response.defer(ephemeral=True)
+            msg = await _leave_roles(
+                interaction.guild,
+                interaction.user,
+                [RoleOptionTuple(picked.id, picked.name)],
+            )
+            await interaction.followup.send(msg, ephemeral=True)
+            return
+
+        view = self.get_role_picker("leave", interaction.guild, interaction.user)
+        if not view:
             raise BotUsageError("There are no roles you can leave")
 
-        view = RoleLeaveView(options=options)
         await interaction.response.send_message(view=view, ephemeral=True)
 
+    @role_leave.autocomplete("role")
+    async def role_leave_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        if not interaction.guild or not isinstance(interaction.user, discord.Member):
+            return []
+
+        roles = self.role_index.search_leavable_roles(
+            interaction.guild, interaction.user, current
+        )
+        return [
+            app_commands.Choice(name=r.name, value=str(r.id))
+            for r in itertools.islice(roles, MAX_AUTOCOMPLETE_CHOICES)
+        ]
+
 
 async def setup(bot: commands.Bot) -> None:
     bot.add_view(RoleJoinView())
     bot.add_view(RoleLeaveView())
-    await bot.add_cog(RoleExtension())
+    bot.add_dynamic_items(RolePageButton)
+    await bot.add_cog(RoleExtension(bot))
@@ -3,18 +3,25 @@ import io
 import discord
 from discord import app_commands
 from discord.ext import commands
-import matplotlib
-import matplotlib.pyplot as plt
 
 from peanuts_bot.errors import BotUsageError
+from peanuts_bot.libraries.charts import ChartRenderer
 from peanuts_bot.libraries.stocks_api import AlphaV, StockAPI
 from peanuts_bot.libraries.stocks_api.errors import StocksAPIRateLimitError
-from peanuts_bot.libraries.stocks_api.interface import IDaily, IStock, ITicker
+from peanuts_bot.libraries.stocks_api.interface import (
+    IDaily,
+    IStock,
+    ITicker,
+    TimeFilter,
+)
 
 __all__ = ["StockExtension"]
 
 
 class StockExtension(commands.Cog):
+    def __init__(self) -> None:
+        self._stock_api = StockAPI(AlphaV)
+
     @staticmethod
     def get_help_color() -> discord.Color:
         return discord.Color.from_str("#8E44AD")
@@ -26,22 +33,23 @@ class StockExtension(commands.Cog):
     async def stock(self, interaction: discord.Interaction, ticker: str) -> None:
         """Retrieves daily stock information for the specified security"""
 
-        stock_api = StockAPI(AlphaV)
-
+        time_filter = TimeFilter.LAST_MONTH
+        # a cold fetch can outlast the interaction's 3s response window
+        await interaction.response.defer()
         try:
-            stock_data = await stock_api.get_stock(ticker)
+            stock_data = await self._stock_api.get_stock(ticker, time_filter)
         except StocksAPIRateLimitError:
             raise BotUsageError(
                 f"Could not get stock info for {ticker}. Try again later."
             )
 
-        graph_file = _gen_stock_graph(stock_data)
+        graph_file = await _gen_stock_graph(stock_data, time_filter)
         embed = daily_stock_to_embed(stock_data, graph=graph_file)
 
         if graph_file:
-            await interaction.response.send_message(embed=embed, file=graph_file)
+            await interaction.followup.send(embed=embed, file=graph_file)
         else:
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
 
     @stock.autocomplete("ticker")
     async def stock_ticker_autocomplete(
@@ -56,8 +64,7 @@ class StockExtension(commands.Cog):
                 label = label[:97] + "..."
             return label
 
-        stock_api = StockAPI(AlphaV)
-        search_results = await stock_api.search_symbol(current)
+        search_results = await self._stock_api.search_symbol(current)
         return [
             app_commands.Choice(name=_get_option_label(r), value=r.symbol_id)
             for r in search_results
@@ -113,33 +120,18 @@ def _add_fields(embed: discord.Embed, /, *, stock: IStock[IDaily]) -> discord.Em
     return embed
 
 
-def _gen_stock_graph(stock: IStock[IDaily]) -> discord.File | None:
+async def _gen_stock_graph(
+    stock: IStock[IDaily], time_filter: TimeFilter
+) -> discord.File | None:
     if len(stock.daily_prices) < 2:
         return None
 
-    matplotlib.use("agg")
-
-    plt.figure(figsize=(15, 10), dpi=60)
-    x = [dp.date.strftime("%Y-%m-%d") for dp in stock.daily_prices]
-    y = [dp.close for dp in stock.daily_prices]
-    plt.plot(x, y, color="tab:red")
-
-    plt.xticks(fontsize=20, rotation=60)
-    plt.yticks(fontsize=24)
-
-    plt.grid(axis="both", alpha=1)
-    plt.gca().spines["top"].set_alpha(0.0)
-    plt.gca().spines["bottom"].set_alpha(0.0)
-    plt.gca().spines["right"].set_alpha(0.0)
-    plt.gca().spines["left"].set_alpha(0.0)
-
-    img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format="png", bbox_inches="tight")
-    img_buffer.seek(0)
-
-    plt.close("all")
-
-    return discord.File(img_buffer, filename="stockgraph.png")
+    png = await ChartRenderer().render_line_chart(
+        (stock.symbol, stock.refreshed_at, time_filter.name),
+        [dp.date.strftime("%Y-%m-%d") for dp in stock.daily_prices],
+        [dp.close for dp in stock.daily_prices],
+    )
+    return discord.File(io.BytesIO(png), filename="stockgraph.png")
 
 
 async def setup(bot: commands.Bot) -> None:
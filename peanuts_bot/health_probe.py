@@ -1,20 +1,266 @@
-import uvicorn
-from fastapi import FastAPI
+import asyncio
+import json
+import logging
 from threading import Thread
+import time
+import typing
 
-app = FastAPI()
+from discord.gateway import DiscordWebSocket
 
+from peanuts_bot.libraries.discord.metrics import render_metrics
+from peanuts_bot.libraries.metrics import CONTENT_TYPE
 
-@app.get("/ping")
-async def health_probe():
-    return {"message": "pong"}
+if typing.TYPE_CHECKING:
+    from fastapi import FastAPI
 
+    from peanuts_bot.bot import PeanutsBot
 
-def start_server():
-    uvicorn.run(app, host="0.0.0.0", port=8000)
 
+logger = logging.getLogger(__name__)
 
-def start_background_server():
-    thread = Thread(target=start_server)
+HEALTH_PROBE_PORT = 8000
+
+MAX_LOOP_LAG = 1.0
+"""the most seconds the event loop may fall behind before the bot isn't ready"""
+
+DEFAULT_HEARTBEAT_INTERVAL = 45.0
+"""the heartbeat interval assumed until the gateway sends the real one"""
+
+MAX_REQUEST_BYTES = 8 * 1024
+REQUEST_TIMEOUT = 5.0
+
+_STATUS_TEXT = {
+    200: "OK",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    503: "Service Unavailable",
+}
+
+
+def _get_heartbeat_ack_age(ws: DiscordWebSocket) -> float | None:
+    """Returns the seconds since the gateway last ACKed a heartbeat, or None if
+    the heartbeat hasn't started yet"""
+    keep_alive = getattr(ws, "_keep_alive", None)
+    last_ack = getattr(keep_alive, "_last_ack", None)
+    return time.perf_counter() - last_ack if last_ack is not None else None
+
+
+class HealthProbe:
+    """A global health probe, which serves liveness, readiness and metrics over
+    HTTP from the bot's own event loop.
+
+    - `/live` responds as long as the event loop is running
+    - `/ready` fails when the gateway is disconnected, heartbeats stop being
+      ACKed, or the event loop falls behind
+    - `/metrics` serves the bot's metrics in the Prometheus text format
+
+    To use, the probe must first be initialized during application bootup, and
+    closed on shutdown
+
+    ```python
+    HealthProbe.init(bot)
+    ...
+    HealthProbe.close()
+    ```
+
+    Pass `serve=False` to only monitor the bot, when the endpoints are served
+    by the FastAPI app instead.
+    """
+
+    LOOP_LAG_INTERVAL: typing.ClassVar[float] = 1.0
+    """seconds between each measurement of the event loop lag"""
+
+    loop_lag: float
+    """how many seconds late the event loop last woke up the lag monitor"""
+
+    _bot: "PeanutsBot"
+    _port: int
+    _server: asyncio.Server | None
+    _tasks: list[asyncio.Task[None]]
+
+    _instance: typing.ClassVar["HealthProbe | None"] = None
+    __init_flag: typing.ClassVar[bool] = False
+
+    def __new__(cls) -> "HealthProbe":
+        if cls.__init_flag:
+            cls._instance = super().__new__(cls)
+            cls.__init_flag = False
+
+        if not cls._instance:
+            raise RuntimeError(
+                "HealthProbe must first be initialized by calling `init`"
+            )
+
+        return cls._instance
+
+    @classmethod
+    def init(
+        cls, bot: "PeanutsBot", *, port: int = HEALTH_PROBE_PORT, serve: bool = True
+    ) -> None:
+        """Initialize the HealthProbe. Must be called from within the event loop."""
+        cls.__init_flag = True
+        probe = cls()
+        probe._bot = bot
+        probe._port = port
+        probe._server = None
+        probe.loop_lag = 0.0
+        probe._tasks = [asyncio.create_task(probe.__monitor_loop_lag())]
+        if serve:
+            probe._tasks.append(asyncio.create_task(probe.__serve()))
+
+    @classmethod
+    def close(cls) -> None:
+        """Stops the server and the lag monitor, if the probe was initialized"""
+        if not cls._instance:
+            return
+
+        for task in cls._instance._tasks:
+            task.cancel()
+        if cls._instance._server:
+            cls._instance._server.close()
+        cls._instance = None
+
+    def check_live(self) -> dict[str, typing.Any]:
+        """Returns the liveness details. Being able to respond at all means the
+        event loop is alive."""
+        return {"status": "ok", "loop_lag": self.loop_lag}
+
+    def check_ready(self) -> tuple[bool, dict[str, typing.Any]]:
+        """Returns whether the bot is ready to serve, along with the details of
+        each check"""
+        ws = self._bot.ws
+        connected = self._bot.is_ready() and ws is not None and ws.open
+        ack_age = _get_heartbeat_ack_age(ws) if ws is not None else None
+
+        interval = getattr(getattr(ws, "_keep_alive", None), "interval", None)
+        max_ack_age = 2 * (interval or DEFAULT_HEARTBEAT_INTERVAL)
+
+        checks = {
+            "gateway_connected": connected,
+            "heartbeat_acked": ack_age is not None and ack_age <= max_ack_age,
+            "loop_responsive": self.loop_lag <= MAX_LOOP_LAG,
+        }
+        ready = all(checks.values())
+        return ready, {
+            "status": "ok" if ready else "unavailable",
+            "checks": checks,
+            "heartbeat_ack_age": ack_age,
+            "loop_lag": self.loop_lag,
+        }
+
+    async def __monitor_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.LOOP_LAG_INTERVAL)
+            self.loop_lag = max(0.0, loop.time() - start - self.LOOP_LAG_INTERVAL)
+            if self.loop_lag > MAX_LOOP_LAG:
+                logger.warning(f"event loop fell behind by {self.loop_lag:.3f}s")
+
+    async def __serve(self) -> None:
+        self._server = await asyncio.start_server(
+            self.__handle, host="0.0.0.0", port=self._port, limit=MAX_REQUEST_BYTES
+        )
+        logger.info(f"health probe listening on port {self._port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def __handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            head = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"), timeout=REQUEST_TIMEOUT
+            )
+            method, target, *_ = head.decode("latin-1").split(" ", 2)
+            status, content_type, body = self.__route(method, target.split("?")[0])
+            writer.write(
+                f"HTTP/1.1 {status} {_STATUS_TEXT[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            asyncio.TimeoutError,
+            ConnectionError,
+            ValueError,
+        ):
+            # malformed or abandoned requests are dropped without a response
+            pass
+        finally:
+            writer.close()
+
+    def __route(self, method: str, path: str) -> tuple[int, str, bytes]:
+        if path not in ("/live", "/ready", "/metrics", "/ping"):
+            return 404, "application/json", b'{"status": "not found"}'
+        if method != "GET":
+            return 405, "application/json", b'{"status": "method not allowed"}'
+
+        if path == "/metrics":
+            return 200, CONTENT_TYPE, render_metrics(self._bot).encode()
+        if path == "/ready":
+            ready, details = self.check_ready()
+            return (200 if ready else 503), "application/json", _to_json(details)
+        if path == "/ping":
+            pong = {"message": "pong", "startup": self._bot.startup.to_dict()}
+            return 200, "application/json", _to_json(pong)
+        return 200, "application/json", _to_json(self.check_live())
+
+
+def _to_json(data: dict[str, typing.Any]) -> bytes:
+    return json.dumps(data).encode()
+
+
+def create_app(bot: "PeanutsBot") -> "FastAPI":
+    """Creates a FastAPI app serving the health probe's endpoints. The checks
+    run on the bot's event loop, so `HealthProbe` must be initialized with
+    `serve=False`."""
+    from fastapi import FastAPI, Response
+
+    app = FastAPI()
+
+    async def on_bot_loop(fn: typing.Callable[[], typing.Any]) -> typing.Any:
+        async def _run() -> typing.Any:
+            return fn()
+
+        future = asyncio.run_coroutine_threadsafe(_run(), bot.loop)
+        return await asyncio.wrap_future(future)
+
+    @app.get("/ping")
+    async def health_probe():
+        return {"message": "pong", "startup": bot.startup.to_dict()}
+
+    @app.get("/live")
+    async def live():
+        return await on_bot_loop(lambda: HealthProbe().check_live())
+
+    @app.get("/ready")
+    async def ready(response: Response):
+        is_ready, details = await on_bot_loop(lambda: HealthProbe().check_ready())
+        if not is_ready:
+            response.status_code = 503
+        return details
+
+    @app.get("/metrics")
+    async def metrics():
+        body = await on_bot_loop(lambda: render_metrics(bot))
+        return Response(content=body, media_type=CONTENT_TYPE)
+
+    return app
+
+
+def start_server(bot: "PeanutsBot"):
+    import uvicorn
+
+    uvicorn.run(create_app(bot), host="0.0.0.0", port=HEALTH_PROBE_PORT)
+
+
+def start_background_server(bot: "PeanutsBot"):
+    """Serves the FastAPI app in a daemon thread"""
+    thread = Thread(target=start_server, args=(bot,))
     thread.daemon = True
     thread.start()
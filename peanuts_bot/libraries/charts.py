@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+import io
+import logging
+import time
+import typing
+
+from peanuts_bot.libraries.workers import run_in_process
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChartStats:
+    """Render counters for the chart cache"""
+
+    hits: int = 0
+    """the number of charts served from the cache"""
+
+    misses: int = 0
+    """the number of charts that had to be rendered"""
+
+    render_seconds: float = 0.0
+    """the total time spent waiting on renders"""
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def render_line_chart(labels: list[str], values: list[float]) -> bytes:
+    """Renders a line chart as a PNG image.
+
+    Uses the object-oriented `Figure` API so no global pyplot state is touched,
+    which makes it safe to call from a worker process.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(15, 10), dpi=60)
+    ax = fig.subplots()
+    ax.plot(labels, values, color="tab:red")
+
+    ax.tick_params(axis="x", labelsize=20, labelrotation=60)
+    ax.tick_params(axis="y", labelsize=24)
+
+    ax.grid(axis="both", alpha=1)
+    for spine in ax.spines.values():
+        spine.set_alpha(0.0)
+
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format="png", bbox_inches="tight")
+    return img_buffer.getvalue()
+
+
+class ChartRenderer:
+    """A global chart renderer that draws charts in the worker process pool, and
+    caches the rendered images so repeat lookups skip rendering entirely.
+
+    To use, the renderer must first be initialized during application bootup
+
+    ```python
+    ChartRenderer.init()
+    ```
+
+    Then when you want a chart, do the following:
+
+    ```python
+    png = await ChartRenderer().render_line_chart(cache_key, labels, values)
+    ```
+    """
+
+    MAX_CACHED_CHARTS: typing.ClassVar[int] = 32
+
+    stats: ChartStats
+    _cache: OrderedDict[Hashable, bytes]
+
+    _instance: typing.ClassVar["ChartRenderer | None"] = None
+    __init_flag: typing.ClassVar[bool] = False
+
+    def __new__(cls) -> "ChartRenderer":
+        if cls.__init_flag:
+            cls._instance = super().__new__(cls)
+            cls.__init_flag = False
+
+        if not cls._instance:
+            raise RuntimeError(
+                "ChartRenderer must first be initialized by calling `init`"
+            )
+
+        return cls._instance
+
+    @classmethod
+    def init(cls) -> None:
+        """Initialize the ChartRenderer"""
+        cls.__init_flag = True
+        renderer = cls()
+        renderer.stats = ChartStats()
+        renderer._cache = OrderedDict()
+
+    async def render_line_chart(
+        self, key: Hashable, labels: list[str], values: list[float]
+    ) -> bytes:
+        """Returns a line chart as a PNG image, rendering it only if no chart was
+        cached for the given key"""
+        if (png := self._cache.get(key)) is not None:
+            self.stats.hits += 1
+            self._cache.move_to_end(key)
+            return png
+
+        self.stats.misses += 1
+        start = time.perf_counter()
+        png = await run_in_process(render_line_chart, labels, values)
+        elapsed = time.perf_counter() - start
+        self.stats.render_seconds += elapsed
+        logger.debug(f"rendered chart {key} in {elapsed:.3f}s")
+
+        self._cache[key] = png
+        while len(self._cache) > self.MAX_CACHED_CHARTS:
+            self._cache.popitem(last=False)
+        return png
@@ -1,6 +1,15 @@
+import asyncio
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
 from enum import Enum
+import hashlib
+import json
 import logging
+from pathlib import Path
+import time
 import traceback
+import typing
 
 import discord
 from discord import app_commands
@@ -11,43 +20,360 @@ from peanuts_bot.libraries.discord.api import get_bot_description
 
 logger = logging.getLogger(__name__)
 
+_admin_dm_channel: discord.DMChannel | None = None
 
-async def send_error_to_admin(error: Exception, bot: discord.Client) -> None:
-    """Forwards the exception to the bot admin user
 
-    If the admin user is not found, this function does nothing
+async def get_admin_dm_channel(bot: discord.Client) -> discord.DMChannel:
+    """Returns the DM channel with the bot admin user, only looking it up via the
+    api the first time it is needed
+
+    Raises `discord.NotFound` if the admin user does not exist
     """
-    try:
-        admin = await bot.fetch_user(CONFIG.ADMIN_USER_ID)
-    except discord.NotFound:
-        return
+    global _admin_dm_channel
+    if _admin_dm_channel is None:
+        admin = bot.get_user(CONFIG.ADMIN_USER_ID) or await bot.fetch_user(
+            CONFIG.ADMIN_USER_ID
+        )
+        _admin_dm_channel = admin.dm_channel or await admin.create_dm()
+    return _admin_dm_channel
+
+
+@dataclass
+class ErrorReporterStats:
+    """Counters for the admin error reporter"""
+
+    reported: int = 0
+    """the number of errors reported"""
+
+    collapsed: int = 0
+    """the number of errors folded into an earlier error with the same fingerprint"""
+
+    digests_sent: int = 0
+    """the number of digest messages sent to the admin"""
+
+    overflowed: int = 0
+    """the number of error groups written to the overflow file instead of sent"""
+
+
+@dataclass
+class _ErrorGroup:
+    title: str
+    traceback: str
+    count: int
+    first_seen: float
+    last_seen: float
 
-    tb = "".join(traceback.format_exception(error)).replace(
-        CONFIG.BOT_TOKEN, "[REDACTED]"
+
+def fingerprint_error(error: BaseException) -> str:
+    """Identifies an error by its type and where it was raised, so repeats of the
+    same failure share a fingerprint regardless of their message"""
+    frames = traceback.extract_tb(error.__traceback__)
+    key = "|".join(
+        [
+            type(error).__qualname__,
+            *(f"{f.filename}:{f.name}:{f.lineno}" for f in frames),
+        ]
     )
-    await admin.send(
-        embed=discord.Embed(
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+class ErrorReporter:
+    """A global reporter that forwards unexpected errors to the bot admin.
+
+    Errors are grouped by fingerprint and sent as a periodic digest, so an
+    outage produces one message with a count instead of one DM per error. The
+    number of digests sent is capped, and any groups that can't be sent are
+    appended to an overflow file instead.
+
+    To use, the reporter must first be initialized during application bootup
+
+    ```python
+    ErrorReporter.init(bot, data_dir)
+    ```
+
+    Then when you want to report an error, do the following:
+
+    ```python
+    ErrorReporter().report(error)
+    ```
+    """
+
+    DEFAULT_WINDOW: typing.ClassVar[float] = 60
+    MAX_DIGESTS: typing.ClassVar[int] = 6
+    """the most digests that may be sent within `DIGEST_PERIOD`"""
+    DIGEST_PERIOD: typing.ClassVar[float] = 60 * 60
+    MAX_EMBEDS: typing.ClassVar[int] = 10
+    MAX_EMBED_CHARS: typing.ClassVar[int] = 5500
+
+    window: float
+    stats: ErrorReporterStats
+    _bot: discord.Client
+    _overflow_path: Path
+    _pending: dict[str, _ErrorGroup]
+    _sent_at: deque[float]
+    _flusher: asyncio.Task[None] | None
+
+    _instance: typing.ClassVar["ErrorReporter | None"] = None
+    __init_flag: typing.ClassVar[bool] = False
+
+    def __new__(cls) -> "ErrorReporter":
+        if cls.__init_flag:
+            cls._instance = super().__new__(cls)
+            cls.__init_flag = False
+
+        if not cls._instance:
+            raise RuntimeError(
+                "ErrorReporter must first be initialized by calling `init`"
+            )
+
+        return cls._instance
+
+    @classmethod
+    def init(
+        cls, bot: discord.Client, data_dir: str | Path, window: float = DEFAULT_WINDOW
+    ) -> None:
+        """Initialize the ErrorReporter. Must be called from within the event loop."""
+        cls.__init_flag = True
+        reporter = cls()
+        reporter.window = window
+        reporter.stats = ErrorReporterStats()
+        reporter._bot = bot
+        reporter._overflow_path = Path(data_dir) / "admin_errors.jsonl"
+        reporter._pending = {}
+        reporter._sent_at = deque()
+        reporter._flusher = asyncio.create_task(reporter.__flush_periodically())
+
+    @classmethod
+    def close(cls) -> None:
+        """Stops the digests, recording any unsent errors to the overflow file"""
+        if not cls._instance:
+            return
+
+        if cls._instance._flusher:
+            cls._instance._flusher.cancel()
+        cls._instance.__overflow(list(cls._instance._pending.values()))
+        cls._instance = None
+
+    def report(self, error: BaseException) -> None:
+        """Queues the error to be sent to the admin in the next digest"""
+        self.stats.reported += 1
+        now = time.time()
+
+        key = fingerprint_error(error)
+        if group := self._pending.get(key):
+            self.stats.collapsed += 1
+            group.count += 1
+            group.last_seen = now
+            return
+
+        tb = "".join(traceback.format_exception(error)).replace(
+            CONFIG.BOT_TOKEN, "[REDACTED]"
+        )
+        self._pending[key] = _ErrorGroup(
             title=f"Error: {type(error).__name__}",
-            color=discord.Color.red(),
-            description=f"```\n{tb[:4088]}```",
+            traceback=tb,
+            count=1,
+            first_seen=now,
+            last_seen=now,
         )
-    )
+
+    async def flush(self) -> None:
+        """Sends the errors reported since the last digest to the admin"""
+        groups = list(self._pending.values())
+        self._pending.clear()
+
+        for i in range(0, len(groups), self.MAX_EMBEDS):
+            chunk = groups[i : i + self.MAX_EMBEDS]
+            if not self.__can_send():
+                logger.warning("admin error digest rate exceeded")
+                self.__overflow(groups[i:])
+                return
+
+            try:
+                channel = await get_admin_dm_channel(self._bot)
+                await channel.send(embeds=self.__to_embeds(chunk))
+            except asyncio.CancelledError:
+                # the bot is shutting down, so keep the unsent errors for later
+                self.__overflow(groups[i:])
+                raise
+            except Exception:
+                logger.warning("failed to send admin error digest", exc_info=True)
+                self.__overflow(groups[i:])
+                return
+
+            self._sent_at.append(time.monotonic())
+            self.stats.digests_sent += 1
+
+    def __can_send(self) -> bool:
+        cutoff = time.monotonic() - self.DIGEST_PERIOD
+        while self._sent_at and self._sent_at[0] < cutoff:
+            self._sent_at.popleft()
+        return len(self._sent_at) < self.MAX_DIGESTS
+
+    def __to_embeds(self, groups: list[_ErrorGroup]) -> list[discord.Embed]:
+        max_tb = min(4088, self.MAX_EMBED_CHARS // len(groups) - 100)
+        return [
+            discord.Embed(
+                title=g.title if g.count == 1 else f"{g.title} (x{g.count})",
+                color=discord.Color.red(),
+                description=f"```\n{g.traceback[-max_tb:]}```",
+                timestamp=datetime.fromtimestamp(g.last_seen, timezone.utc),
+            )
+            for g in groups
+        ]
+
+    def __overflow(self, groups: list[_ErrorGroup]) -> None:
+        if not groups:
+            return
+
+        self.stats.overflowed += len(groups)
+        try:
+            self._overflow_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._overflow_path.open("a") as f:
+                for g in groups:
+                    f.write(json.dumps(asdict(g)) + "\n")
+        except OSError:
+            logger.exception(f"failed to record {len(groups)} errors to overflow file")
+
+    async def __flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("failed to flush admin error digest")
+
+
+def report_error_to_admin(error: BaseException) -> None:
+    """Forwards the exception to the bot admin user in the next error digest"""
+    ErrorReporter().report(error)
 
 
 class Features(str, Enum):
     VOICE_ANNOUNCER = "voice_announcer"
 
 
+@dataclass
+class FeatureFlagStats:
+    """Lookup counters for the feature flag cache"""
+
+    hits: int = 0
+    """the number of lookups served from memory"""
+
+    misses: int = 0
+    """the number of lookups that had to wait on a REST call"""
+
+    refreshes: int = 0
+    """the number of times the bot description was fetched"""
+
+
+def _parse_feature_flags(desc: str) -> frozenset[str]:
+    return frozenset(c.strip() for c in desc.replace(":", ",").split(","))
+
+
+class FeatureFlags:
+    """A global cache of the feature flags set in the bot's description.
+
+    The flags are refreshed in the background every `ttl` seconds, so feature
+    lookups are served from memory instead of the `applications/@me` endpoint.
+
+    To use, the cache must first be initialized during application bootup
+
+    ```python
+    FeatureFlags.init()
+    ```
+
+    Then when you want to check the enabled flags, do the following:
+
+    ```python
+    flags = await FeatureFlags().get_flags()
+    ```
+    """
+
+    DEFAULT_TTL: typing.ClassVar[float] = 5 * 60
+
+    ttl: float
+    stats: FeatureFlagStats
+    _flags: frozenset[str] | None
+    _refresher: asyncio.Task[None] | None
+    _lock: asyncio.Lock
+
+    _instance: typing.ClassVar["FeatureFlags | None"] = None
+    __init_flag: typing.ClassVar[bool] = False
+
+    def __new__(cls) -> "FeatureFlags":
+        if cls.__init_flag:
+            cls._instance = super().__new__(cls)
+            cls.__init_flag = False
+
+        if not cls._instance:
+            raise RuntimeError(
+                "FeatureFlags must first be initialized by calling `init`"
+            )
+
+        return cls._instance
+
+    @classmethod
+    def init(cls, ttl: float = DEFAULT_TTL) -> None:
+        """Initialize the FeatureFlags cache. Must be called from within the event loop."""
+        cls.__init_flag = True
+        flags = cls()
+        flags.ttl = ttl
+        flags.stats = FeatureFlagStats()
+        flags._flags = None
+        flags._lock = asyncio.Lock()
+        flags._refresher = asyncio.create_task(flags.__refresh_periodically())
+
+    @classmethod
+    def close(cls) -> None:
+        """Stops the background refresh, if the cache was initialized"""
+        if cls._instance and cls._instance._refresher:
+            cls._instance._refresher.cancel()
+        cls._instance = None
+
+    async def get_flags(self) -> frozenset[str]:
+        """Returns the enabled feature flags, only fetching them if they were
+        never successfully loaded"""
+        if self._flags is not None:
+            self.stats.hits += 1
+            return self._flags
+
+        self.stats.misses += 1
+        async with self._lock:
+            if self._flags is None:
+                await self.refresh()
+        return self._flags or frozenset()
+
+    async def refresh(self) -> frozenset[str]:
+        """Fetches the bot description and replaces the cached flags.
+
+        If the description cannot be fetched, the previous flags are kept.
+        """
+        try:
+            desc = await get_bot_description()
+        except Exception:
+            logger.warning("failed to fetch bot description", exc_info=True)
+            return self._flags or frozenset()
+
+        logger.debug(f"Bot description: {desc!r}")
+
+        self.stats.refreshes += 1
+        self._flags = _parse_feature_flags(desc)
+        return self._flags
+
+    async def __refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl)
+            await self.refresh()
+
+
 async def has_features(*flags: Features, bot: discord.Client) -> bool:
     """Returns a boolean indicating if all of the features are enabled for the bot.
 
     Features are enabled by adding the literal flag value on a single line of
     the bot's description.
     """
-    desc = await get_bot_description()
-    logger.debug(f"Bot description: {desc!r}")
-
-    enabled_flags = [c.strip() for c in desc.replace(":", ",").split(",")]
+    enabled_flags = await FeatureFlags().get_flags()
     return all(f.value in enabled_flags for f in flags)
 
 
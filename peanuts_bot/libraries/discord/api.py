@@ -1,30 +1,35 @@
-import aiohttp
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 import logging
+import typing
+
+import aiohttp
 
 from peanuts_bot.config import CONFIG
+from peanuts_bot.libraries.http_client import HttpClient
 
 
 logger = logging.getLogger(__name__)
 
+DISCORD_API_URL = "https://discord.com/api/v10/"
+
 
 @asynccontextmanager
-async def get_api_session():
-    async with aiohttp.ClientSession(
-        "https://discord.com/api/v10/",
-        headers={"Authorization": f"Bot {CONFIG.BOT_TOKEN}"},
-    ) as session:
-        yield session
+async def discord_api_request(
+    method: str, path: str, **kwargs: typing.Any
+) -> AsyncIterator[aiohttp.ClientResponse]:
+    """Sends an authorized request to the Discord REST API through the pooled client"""
+    headers = {"Authorization": f"Bot {CONFIG.BOT_TOKEN}", **kwargs.pop("headers", {})}
+    async with HttpClient().request(
+        method, f"{DISCORD_API_URL}{path}", headers=headers, **kwargs
+    ) as response:
+        yield response
 
 
 async def get_bot_description() -> str:
-    try:
-        async with get_api_session() as session:
-            async with session.get("applications/@me") as response:
-                response.raise_for_status()
-                data = await response.json()
-
-        return data.get("description", "")
-    except:
-        logger.warning("failed to fetch bot description", exc_info=True)
-        return ""
+    """Fetches the description of the bot's application"""
+    async with discord_api_request("GET", "applications/@me") as response:
+        response.raise_for_status()
+        data = await response.json()
+
+    return data.get("description", "")
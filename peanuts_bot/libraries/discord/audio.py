@@ -0,0 +1,125 @@
+import asyncio
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+
+import discord
+from discord.oggparse import OggStream
+
+
+logger = logging.getLogger(__name__)
+
+_OPUS_HEADER_PACKETS = (b"OpusHead", b"OpusTags")
+
+
+@dataclass
+class OpusCacheStats:
+    """Playback counters for the pre-encoded opus cache"""
+
+    hits: int = 0
+    """the number of clips played from pre-encoded opus packets"""
+
+    misses: int = 0
+    """the number of clips that fell back to an ffmpeg subprocess"""
+
+    transcodes: int = 0
+    """the number of clips transcoded to opus"""
+
+
+stats = OpusCacheStats()
+_transcoding: dict[Path, asyncio.Task[None]] = {}
+
+
+class OpusPacketAudio(discord.AudioSource):
+    """An audio source that plays already encoded opus packets, so no
+    subprocess or encoder is needed during playback"""
+
+    def __init__(self, packets: list[bytes]) -> None:
+        self._packets = iter(packets)
+
+    def read(self) -> bytes:
+        return next(self._packets, b"")
+
+    def is_opus(self) -> bool:
+        return True
+
+
+def get_opus_path(audio: Path) -> Path:
+    """Returns where the pre-encoded opus copy of an audio file is stored"""
+    return audio.with_suffix(".opus")
+
+
+def _read_opus_packets(path: Path) -> list[bytes]:
+    with path.open("rb") as f:
+        return [
+            p
+            for p in OggStream(f).iter_packets()
+            if not p.startswith(_OPUS_HEADER_PACKETS)
+        ]
+
+
+async def transcode_to_opus(audio: Path) -> None:
+    """Transcodes an audio file to an ogg/opus file stored next to it"""
+    dest = get_opus_path(audio)
+    tmp = dest.with_name(f"{dest.name}.tmp")
+
+    # fmt: off
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-y", "-i", str(audio),
+        "-map_metadata", "-1",
+        "-f", "opus",
+        "-c:a", "libopus",
+        "-ar", "48000",
+        "-ac", "2",
+        "-b:a", "128k",
+        "-loglevel", "warning",
+        str(tmp),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    # fmt: on
+    _, err = await proc.communicate()
+    if proc.returncode != 0:
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"ffmpeg failed to transcode {audio.name}: {err.decode()}")
+
+    tmp.replace(dest)
+    stats.transcodes += 1
+
+
+def _transcode_in_background(audio: Path) -> None:
+    if audio in _transcoding:
+        return
+
+    def _on_done(task: asyncio.Task[None]) -> None:
+        del _transcoding[audio]
+        if not task.cancelled() and task.exception():
+            logger.warning("failed to transcode audio", exc_info=task.exception())
+
+    _transcoding[audio] = asyncio.create_task(transcode_to_opus(audio))
+    _transcoding[audio].add_done_callback(_on_done)
+
+
+async def load_audio_source(audio: Path) -> discord.AudioSource:
+    """Returns a playable source for an audio file.
+
+    Uses the pre-encoded opus copy of the file when available. Otherwise, falls
+    back to ffmpeg for this playback, and transcodes the file in the background
+    so the next playback can skip ffmpeg.
+    """
+    opus_path = get_opus_path(audio)
+    if opus_path.exists():
+        loop = asyncio.get_running_loop()
+        try:
+            packets = await loop.run_in_executor(None, _read_opus_packets, opus_path)
+        except Exception:
+            logger.warning(f"corrupt opus file {opus_path.name}", exc_info=True)
+            opus_path.unlink(missing_ok=True)
+        else:
+            stats.hits += 1
+            return OpusPacketAudio(packets)
+
+    stats.misses += 1
+    _transcode_in_background(audio)
+    return discord.FFmpegPCMAudio(str(audio))
@@ -0,0 +1,96 @@
+from collections.abc import Awaitable, Callable, Iterable
+import hashlib
+import itertools
+import json
+import logging
+from pathlib import Path
+import time
+import typing
+
+import discord
+from discord import app_commands
+
+from peanuts_bot.config import CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+COMMAND_SYNC_STATE_PATH = Path(CONFIG.DATA_DIR) / "command_sync.json"
+"""where the hash of the last synced command payload is persisted"""
+
+
+def get_command_tree_hash(
+    tree: app_commands.CommandTree,
+    guild: discord.Object,
+    extra_commands: Iterable[dict[str, typing.Any]] = (),
+) -> str:
+    """Returns a stable hash of the payload syncing the guild's commands would send
+
+    `extra_commands` are the payloads of commands that will be added to the tree
+    before syncing.
+    """
+    payload = sorted(
+        itertools.chain(
+            (cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)),
+            extra_commands,
+        ),
+        key=lambda c: (c.get("type", 1), c["name"]),
+    )
+    serialized = json.dumps(
+        {"application_id": tree.client.application_id, "commands": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def _load_state(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+async def sync_command_tree(
+    tree: app_commands.CommandTree,
+    guild: discord.Object,
+    *,
+    force: bool = False,
+    unloaded_commands: list[dict[str, typing.Any]] | None = None,
+    before_sync: Callable[[], Awaitable[None]] | None = None,
+    state_path: Path = COMMAND_SYNC_STATE_PATH,
+) -> list[app_commands.AppCommand] | None:
+    """Syncs the guild's commands, unless they haven't changed since the last sync.
+
+    The hash of the last synced payload is persisted to `state_path`. Returns
+    the synced commands, or None if the sync was skipped.
+
+    `unloaded_commands` are the payloads of commands that aren't in the tree yet,
+    and `before_sync` is awaited to add them to the tree if a sync is needed.
+    """
+    state = _load_state(state_path)
+    payload_hash = get_command_tree_hash(tree, guild, unloaded_commands or [])
+
+    if not force and state.get(str(guild.id)) == payload_hash:
+        saved = state.get("last_sync_seconds", 0.0)
+        logger.info(f"Commands unchanged, skipped sync (saved ~{saved:.2f}s)")
+        return None
+
+    start = time.perf_counter()
+    if before_sync:
+        await before_sync()
+    synced = await tree.sync(guild=guild)
+    duration = time.perf_counter() - start
+    logger.info(
+        f"Synced {len(synced)} commands in {duration:.2f}s: {[c.name for c in synced]}"
+    )
+
+    state[str(guild.id)] = payload_hash
+    state["last_sync_seconds"] = duration
+    try:
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps(state))
+    except OSError:
+        logger.warning("failed to persist the command sync state", exc_info=True)
+
+    return synced
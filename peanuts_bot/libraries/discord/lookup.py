@@ -0,0 +1,31 @@
+import discord
+
+
+async def get_or_fetch_channel(
+    client: discord.Client, channel_id: int
+) -> discord.abc.GuildChannel | discord.abc.PrivateChannel | discord.Thread:
+    """
+    Gets a channel from the client's cache, only fetching it from the api on a miss
+
+    :param client: The client to look the channel up with
+    :param channel_id: The ID of the channel
+    :return: The channel
+    """
+    channel = client.get_channel(channel_id)
+    if channel is None:
+        channel = await client.fetch_channel(channel_id)
+    return channel
+
+
+async def get_or_fetch_member(guild: discord.Guild, member_id: int) -> discord.Member:
+    """
+    Gets a member from the guild's cache, only fetching them from the api on a miss
+
+    :param guild: The guild the member belongs to
+    :param member_id: The ID of the member
+    :return: The member
+    """
+    member = guild.get_member(member_id)
+    if member is None:
+        member = await guild.fetch_member(member_id)
+    return member
@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import time
+
+import discord
+
+from peanuts_bot.errors import BotUsageError
+from peanuts_bot.libraries.discord.lookup import get_or_fetch_channel
+from peanuts_bot.libraries.discord.messaging import DiscordMesageLink, is_messagable
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MessageResolverStats:
+    """Lookup counters for the message resolver"""
+
+    gateway_hits: int = 0
+    """the number of messages found in the gateway's message cache"""
+
+    lru_hits: int = 0
+    """the number of messages found among previously fetched messages"""
+
+    negative_hits: int = 0
+    """the number of lookups rejected because the link recently failed"""
+
+    fetches: int = 0
+    """the number of messages fetched from the REST api"""
+
+    failures: int = 0
+    """the number of lookups that failed"""
+
+
+class MessageResolver:
+    """Resolves message links to messages, only falling back to the REST api when
+    the message isn't already cached.
+
+    Lookups try, in order:
+    1. the gateway's message cache
+    2. a bounded LRU of messages this resolver fetched before
+    3. the REST api
+
+    Links that fail to resolve are remembered for a while, so repeatedly posted
+    bad links don't cost an api call each time.
+    """
+
+    MAX_CACHED_MESSAGES = 256
+    MAX_FAILED_LINKS = 256
+    FAILED_LINK_TTL = 5 * 60
+
+    def __init__(self, client: discord.Client) -> None:
+        self.stats = MessageResolverStats()
+        self._client = client
+        self._messages: OrderedDict[int, discord.Message] = OrderedDict()
+        self._failed_links: OrderedDict[DiscordMesageLink, float] = OrderedDict()
+
+    async def resolve(self, link: DiscordMesageLink) -> discord.Message:
+        """Returns the message the link points to
+
+        Raises `BotUsageError` or `discord.HTTPException` if the message could not
+        be retrieved.
+        """
+        failed_until = self._failed_links.get(link)
+        if failed_until is not None:
+            if time.monotonic() < failed_until:
+                self.stats.negative_hits += 1
+                raise BotUsageError("Message could not be found")
+            del self._failed_links[link]
+
+        try:
+            return await self.__resolve(link)
+        except (BotUsageError, discord.HTTPException):
+            self.stats.failures += 1
+            self._failed_links[link] = time.monotonic() + self.FAILED_LINK_TTL
+            while len(self._failed_links) > self.MAX_FAILED_LINKS:
+                self._failed_links.popitem(last=False)
+            raise
+
+    def invalidate(self, message_id: int) -> None:
+        """Forgets a previously fetched message (e.g. because it was edited or deleted)"""
+        self._messages.pop(message_id, None)
+
+    def remember(self, message: discord.Message) -> None:
+        """Caches a message so later lookups don't need an api call"""
+        self._messages[message.id] = message
+        self._messages.move_to_end(message.id)
+        while len(self._messages) > self.MAX_CACHED_MESSAGES:
+            self._messages.popitem(last=False)
+
+    async def prewarm(self, guild: discord.Guild, *, channels: int, limit: int) -> None:
+        """Caches the recent history of the most recently active text channels"""
+        busiest = sorted(
+            (c for c in guild.text_channels if c.last_message_id),
+            key=lambda c: c.last_message_id or 0,
+            reverse=True,
+        )[:channels]
+
+        for channel in busiest:
+            try:
+                async for message in channel.history(limit=limit):
+                    self.remember(message)
+            except discord.HTTPException:
+                logger.debug(f"unable to prewarm #{channel.name}", exc_info=True)
+
+        logger.info(f"prewarmed {len(self._messages)} messages")
+
+    async def __resolve(self, link: DiscordMesageLink) -> discord.Message:
+        gateway_msg = next(
+            (
+                m
+                for m in reversed(self._client.cached_messages)
+                if m.id == link.message_id
+            ),
+            None,
+        )
+        if gateway_msg:
+            self.stats.gateway_hits += 1
+            return gateway_msg
+
+        if cached_msg := self._messages.get(link.message_id):
+            self.stats.lru_hits += 1
+            self._messages.move_to_end(link.message_id)
+            return cached_msg
+
+        ch = await get_or_fetch_channel(self._client, link.channel_id)
+        if not is_messagable(ch):
+            raise BotUsageError("Message could not be found")
+
+        self.stats.fetches += 1
+        message = await ch.fetch_message(link.message_id)
+        self.remember(message)
+        return message
@@ -0,0 +1,107 @@
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+import logging
+import re
+import time
+
+import discord
+
+
+logger = logging.getLogger(__name__)
+
+RuleHandler = Callable[[discord.Message, list[re.Match[str]]], Awaitable[None]]
+
+
+@dataclass
+class RuleStats:
+    """Counters for a single message rule"""
+
+    matches: int = 0
+    """the number of messages the rule was triggered by"""
+
+    errors: int = 0
+    """the number of times the rule's handler raised an exception"""
+
+    seconds: float = 0.0
+    """the total time spent in the rule's handler"""
+
+
+@dataclass
+class MessageRule:
+    """A handler to run for messages that trigger it.
+
+    A rule is triggered by its content `pattern`, by its `predicate`, or both.
+    """
+
+    name: str
+    handler: RuleHandler
+    """called with the message and every match of `pattern` in its content"""
+
+    pattern: str | re.Pattern[str] | None = None
+    """a content trigger, combined with every other rule's pattern into one regex.
+    Group names must be unique across all rules."""
+
+    hints: tuple[str, ...] = ()
+    """literals, one of which must be in the content for `pattern` to match at all.
+    Lets messages skip the regex scan entirely."""
+
+    predicate: Callable[[discord.Message], bool] | None = None
+    """a trigger that doesn't depend on the content (e.g. role mentions)"""
+
+    stats: RuleStats = field(default_factory=RuleStats)
+
+
+class MessageRuleEngine:
+    """Routes each message to the rules it triggers, in a single pass over its content.
+
+    All content patterns are compiled into one combined regex, and messages that
+    contain none of the rules' hints skip the scan entirely.
+    """
+
+    def __init__(self, rules: list[MessageRule]) -> None:
+        self.rules = rules
+
+        self._hints = tuple(h for r in rules if r.pattern is not None for h in r.hints)
+        self._scan_always = any(r.pattern is not None and not r.hints for r in rules)
+
+        alternatives = [
+            f"(?P<_rule{i}>{_pattern_str(r.pattern)})"
+            for i, r in enumerate(rules)
+            if r.pattern is not None
+        ]
+        self._combined = re.compile("|".join(alternatives)) if alternatives else None
+
+    def _could_match(self, content: str) -> bool:
+        if self._combined is None:
+            return False
+        return self._scan_always or any(h in content for h in self._hints)
+
+    async def dispatch(self, msg: discord.Message) -> None:
+        """Runs every rule triggered by the message, in the order the rules were given"""
+        triggered: dict[int, list[re.Match[str]]] = {}
+
+        if self._combined is not None and self._could_match(msg.content):
+            for match in self._combined.finditer(msg.content):
+                if match.lastgroup:
+                    index = int(match.lastgroup.removeprefix("_rule"))
+                    triggered.setdefault(index, []).append(match)
+
+        for i, rule in enumerate(self.rules):
+            if i not in triggered and rule.predicate and rule.predicate(msg):
+                triggered[i] = []
+
+        for i in sorted(triggered):
+            rule = self.rules[i]
+            rule.stats.matches += 1
+            start = time.perf_counter()
+            try:
+                await rule.handler(msg, triggered[i])
+            except Exception:
+                rule.stats.errors += 1
+                logger.exception(f"message rule {rule.name} failed")
+            finally:
+                rule.stats.seconds += time.perf_counter() - start
+
+
+def _pattern_str(pattern: str | re.Pattern[str]) -> str:
+    return pattern.pattern if isinstance(pattern, re.Pattern) else pattern
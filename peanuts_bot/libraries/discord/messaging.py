@@ -1,4 +1,4 @@
-from collections.abc import Iterator
+from collections.abc import Collection, Iterator
 import re
 import typing
 
@@ -32,7 +32,7 @@ def _is_disableable(
 
 
 # Try to match discord message link https://discord.com/channels/<id>/<id>/<id>
-_DISCORD_MSG_URL_REGEX = (
+DISCORD_MSG_URL_REGEX = re.compile(
     r"https?:\/\/discord\.com"
     r"\/channels\/(?P<g_id>[0-9]+)"
     r"\/(?P<c_id>[0-9]+)"
@@ -50,7 +50,11 @@ class DiscordMesageLink(typing.NamedTuple):
         return f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.message_id}"
 
 
-BAD_TWITTER_LINKS = ["https://twitter.com", "https://x.com"]
+LINK_REWRITES: dict[str, str] = {
+    "https://twitter.com": "https://fxtwitter.com",
+    "https://x.com": "https://fxtwitter.com",
+}
+"""Links that don't embed properly, mapped to the replacement that fixes their embed"""
 
 
 def is_messagable(
@@ -66,12 +70,13 @@ def is_messagable(
 
 
 async def disable_message_components(
-    msg: discord.Message | None,
+    msg: discord.Message | None, custom_ids: Collection[str] | None = None
 ) -> discord.Message | None:
     """
     Edits the given message to disable all components
 
     :param msg: The message to disable components for
+    :param custom_ids: If given, only the components with these custom ids are disabled
     :return: The edited message, or None if the message was None
     """
     if msg is None or not msg.components:
@@ -79,7 +84,9 @@ async def disable_message_components(
 
     view = discord.ui.View.from_message(msg, timeout=None)
     for child in view.children:
-        if _is_disableable(child):
+        if _is_disableable(child) and (
+            custom_ids is None or child.custom_id in custom_ids
+        ):
             child.disabled = True
     return await msg.edit(view=view)
 
@@ -91,13 +98,22 @@ def get_discord_msg_links(content: str) -> Iterator[DiscordMesageLink]:
     :param content: The content to search for links
     :return: A iterable of all discord message links found in the content
     """
-    for url in re.finditer(_DISCORD_MSG_URL_REGEX, content):
-        parsed_values = url.groupdict()
-        yield DiscordMesageLink(
-            int(parsed_values["g_id"]),
-            int(parsed_values["c_id"]),
-            int(parsed_values["m_id"]),
-        )
+    for url in DISCORD_MSG_URL_REGEX.finditer(content):
+        yield discord_msg_link_from_match(url)
+
+
+def discord_msg_link_from_match(match: re.Match[str]) -> DiscordMesageLink:
+    """
+    Converts a match of `DISCORD_MSG_URL_REGEX` into a DiscordMesageLink object
+
+    :param match: The match to convert
+    :return: The matched link
+    """
+    return DiscordMesageLink(
+        int(match["g_id"]),
+        int(match["c_id"]),
+        int(match["m_id"]),
+    )
 
 
 def parse_discord_msg_link(link: str) -> DiscordMesageLink | None:
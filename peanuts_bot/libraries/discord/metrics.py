@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+import math
+import typing
+
+import discord
+
+from peanuts_bot.libraries.charts import ChartRenderer
+from peanuts_bot.libraries.discord import audio
+from peanuts_bot.libraries.discord.admin import ErrorReporter, FeatureFlags
+from peanuts_bot.libraries.discord.voice import BotVoice
+from peanuts_bot.libraries.http_client import HttpClient
+from peanuts_bot.libraries.metrics import MetricsWriter, add_process_metrics
+from peanuts_bot.libraries.voice import TTS_TLD, TTSService
+
+
+T = typing.TypeVar("T")
+
+TTS_HOST = f"translate.google.{TTS_TLD}"
+"""the host gTTS synthesizes phrases through"""
+
+
+@dataclass
+class CommandStats:
+    """Invocation counters for an app command"""
+
+    invocations: int = 0
+    """the number of times the command was invoked"""
+
+    errors: int = 0
+    """the number of invocations that raised an error"""
+
+
+command_stats: dict[str, CommandStats] = {}
+"""the stats of each app command, keyed by its qualified name"""
+
+
+def record_command(name: str, *, failed: bool = False) -> None:
+    """Counts an invocation of the app command"""
+    stats = command_stats.setdefault(name, CommandStats())
+    stats.invocations += 1
+    if failed:
+        stats.errors += 1
+
+
+def _get_initialized(cls: typing.Callable[[], T]) -> T | None:
+    try:
+        return cls()
+    except RuntimeError:
+        return None
+
+
+def render_metrics(client: discord.Client) -> str:
+    """Returns the bot's metrics in the Prometheus text exposition format.
+
+    Must be called from within the event loop, since it reads the gateway cache.
+    """
+    writer = MetricsWriter()
+
+    if math.isfinite(client.latency):
+        writer.add(
+            "peanuts_gateway_latency_seconds",
+            "gauge",
+            "Time between the last gateway heartbeat and its ACK",
+            [({}, client.latency)],
+        )
+    writer.add(
+        "peanuts_cached_guilds",
+        "gauge",
+        "Guilds in the gateway cache",
+        [({}, len(client.guilds))],
+    )
+    writer.add(
+        "peanuts_cached_members",
+        "gauge",
+        "Members in the gateway cache",
+        [({"guild": str(g.id)}, len(g.members)) for g in client.guilds],
+    )
+    writer.add(
+        "peanuts_cached_users",
+        "gauge",
+        "Users in the gateway cache",
+        [({}, len(client.users))],
+    )
+    writer.add(
+        "peanuts_cached_messages",
+        "gauge",
+        "Messages in the gateway cache",
+        [({}, len(client.cached_messages))],
+    )
+
+    cmds = sorted(command_stats.items())
+    writer.add(
+        "peanuts_command_invocations_total",
+        "counter",
+        "App command invocations",
+        [({"command": name}, s.invocations) for name, s in cmds],
+    )
+    writer.add(
+        "peanuts_command_errors_total",
+        "counter",
+        "App command invocations that raised an error",
+        [({"command": name}, s.errors) for name, s in cmds],
+    )
+
+    http_hosts = []
+    if http := _get_initialized(HttpClient):
+        http_hosts = sorted(http.stats.items())
+        writer.add_stats("peanuts_http", [({"host": h}, s) for h, s in http_hosts])
+
+    latencies = [({"host": h}, s.latency) for h, s in http_hosts]
+    if tts := _get_initialized(TTSService):
+        latencies.append(({"host": TTS_HOST}, tts.stats.synth_latency))
+        writer.add_stats("peanuts_tts", [({}, tts.stats)])
+    writer.add_histogram(
+        "peanuts_http_request_duration_seconds",
+        "Time until the response of an outbound request was received",
+        latencies,
+    )
+
+    if voice := _get_initialized(BotVoice):
+        writer.add(
+            "peanuts_voice_queue_depth",
+            "gauge",
+            "Announcements waiting to be played",
+            [({}, voice.queue_depth)],
+        )
+        writer.add_stats("peanuts_voice", [({}, voice.stats)])
+    writer.add_stats("peanuts_opus_cache", [({}, audio.stats)])
+
+    if charts := _get_initialized(ChartRenderer):
+        writer.add_stats("peanuts_charts", [({}, charts.stats)])
+    if flags := _get_initialized(FeatureFlags):
+        writer.add_stats("peanuts_feature_flags", [({}, flags.stats)])
+    if reporter := _get_initialized(ErrorReporter):
+        writer.add_stats("peanuts_error_reporter", [({}, reporter.stats)])
+
+    add_process_metrics(writer)
+    return writer.render()
@@ -0,0 +1,171 @@
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+import logging
+
+import discord
+
+from peanuts_bot.libraries.text_index import TextIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_joinable_role(r: discord.Role) -> bool:
+    """Indicates if members can join and leave the role on their own"""
+    return r.mentionable and r.permissions == discord.Permissions.none()
+
+
+@dataclass
+class _GuildRoles:
+    joinable: set[int] = field(default_factory=set)
+    """the ids of the joinable roles in the guild"""
+
+    names: dict[str, int] = field(default_factory=dict)
+    """the ids of every role in the guild, keyed by their case-folded name"""
+
+    members: dict[int, set[int]] = field(default_factory=dict)
+    """the ids of the joinable roles each member has"""
+
+    search: TextIndex[int] = field(default_factory=TextIndex)
+    """a search index of the names of the joinable roles"""
+
+
+class JoinableRoleIndex:
+    """An index of the joinable roles in each guild, and which members have them.
+
+    The index is built from the gateway cache, and must be kept current by
+    forwarding the role and member update events to it.
+    """
+
+    def __init__(self) -> None:
+        self._guilds: dict[int, _GuildRoles] = {}
+
+    def build(self, guild: discord.Guild) -> None:
+        """(Re)builds the index for the guild from its cached roles and members"""
+        index = _GuildRoles(
+            joinable={r.id for r in guild.roles if is_joinable_role(r)},
+            names={r.name.casefold(): r.id for r in guild.roles},
+        )
+        for role_id in index.joinable:
+            if role := guild.get_role(role_id):
+                index.search.add(role_id, role.name)
+        for member in guild.members:
+            if held := index.joinable.intersection(r.id for r in member.roles):
+                index.members[member.id] = held
+
+        self._guilds[guild.id] = index
+        logger.debug(
+            f"indexed {len(index.joinable)} joinable roles for {len(index.members)} members"
+        )
+
+    def add_role(self, role: discord.Role) -> None:
+        """Indexes a newly created role"""
+        index = self.__get(role.guild)
+        index.names[role.name.casefold()] = role.id
+        if is_joinable_role(role):
+            index.joinable.add(role.id)
+            index.search.add(role.id, role.name)
+
+    def update_role(self, before: discord.Role, after: discord.Role) -> None:
+        """Reindexes a role after its name or permissions changed"""
+        index = self.__get(after.guild)
+        if index.names.get(before.name.casefold()) == before.id:
+            del index.names[before.name.casefold()]
+        index.names[after.name.casefold()] = after.id
+
+        was_joinable = before.id in index.joinable
+        if was_joinable and is_joinable_role(after):
+            index.search.add(after.id, after.name)
+            return
+        if not was_joinable and not is_joinable_role(after):
+            return
+
+        if was_joinable:
+            self.__remove_joinable(index, after.id)
+            return
+
+        index.joinable.add(after.id)
+        index.search.add(after.id, after.name)
+        for member in after.members:
+            index.members.setdefault(member.id, set()).add(after.id)
+
+    def remove_role(self, role: discord.Role) -> None:
+        """Removes a deleted role from the index"""
+        index = self.__get(role.guild)
+        if index.names.get(role.name.casefold()) == role.id:
+            del index.names[role.name.casefold()]
+
+        self.__remove_joinable(index, role.id)
+
+    def update_member(self, member: discord.Member) -> None:
+        """Reindexes the joinable roles a member has"""
+        index = self.__get(member.guild)
+        if held := index.joinable.intersection(r.id for r in member.roles):
+            index.members[member.id] = held
+        else:
+            index.members.pop(member.id, None)
+
+    def remove_member(self, guild: discord.Guild, member_id: int) -> None:
+        """Removes a member who left the guild from the index"""
+        self.__get(guild).members.pop(member_id, None)
+
+    def get_role_by_name(self, guild: discord.Guild, name: str) -> discord.Role | None:
+        """Returns the role with the given name, ignoring case"""
+        role_id = self.__get(guild).names.get(name.casefold())
+        return guild.get_role(role_id) if role_id is not None else None
+
+    def get_joinable_roles(
+        self, guild: discord.Guild, member: discord.Member
+    ) -> list[discord.Role]:
+        """Returns the joinable roles the member does not have yet"""
+        index = self.__get(guild)
+        return self.__to_roles(
+            guild, index.joinable - index.members.get(member.id, set())
+        )
+
+    def get_leavable_roles(
+        self, guild: discord.Guild, member: discord.Member
+    ) -> list[discord.Role]:
+        """Returns the joinable roles the member already has"""
+        return self.__to_roles(guild, self.__get(guild).members.get(member.id, set()))
+
+    def search_joinable_roles(
+        self, guild: discord.Guild, member: discord.Member, query: str
+    ) -> Iterator[discord.Role]:
+        """Yields the joinable roles the member does not have yet that match the
+        query, best matches first"""
+        index = self.__get(guild)
+        held = index.members.get(member.id, set())
+        for role_id in index.search.search(query):
+            if role_id not in held and (role := guild.get_role(role_id)):
+                yield role
+
+    def search_leavable_roles(
+        self, guild: discord.Guild, member: discord.Member, query: str
+    ) -> Iterator[discord.Role]:
+        """Yields the joinable roles the member already has that match the query,
+        best matches first"""
+        index = self.__get(guild)
+        held = index.members.get(member.id, set())
+        for role_id in index.search.search(query):
+            if role_id in held and (role := guild.get_role(role_id)):
+                yield role
+
+    def __get(self, guild: discord.Guild) -> _GuildRoles:
+        if guild.id not in self._guilds:
+            self.build(guild)
+        return self._guilds[guild.id]
+
+    def __remove_joinable(self, index: _GuildRoles, role_id: int) -> None:
+        index.joinable.discard(role_id)
+        index.search.remove(role_id)
+        for member_id, held in list(index.members.items()):
+            held.discard(role_id)
+            if not held:
+                del index.members[member_id]
+
+    def __to_roles(
+        self, guild: discord.Guild, role_ids: set[int]
+    ) -> list[discord.Role]:
+        roles = [r for r in map(guild.get_role, role_ids) if r]
+        return sorted(roles, key=lambda r: r.name.casefold())
@@ -1,29 +1,97 @@
 import asyncio
-from dataclasses import dataclass
-import io
+from dataclasses import dataclass, field
 import logging
-import queue
+import time
 import typing
 
 import discord
 
 from peanuts_bot.config import CONFIG
 from peanuts_bot.libraries.discord.admin import Features, has_features
-from peanuts_bot.libraries.voice import generate_tts_audio
+from peanuts_bot.libraries.discord.audio import load_audio_source
+from peanuts_bot.libraries.voice import MAX_TTS_LENGTH, TTSService, event_phrase
 
 
 logger = logging.getLogger(__name__)
 
 
 @dataclass
-class _Work:
-    audio: io.BytesIO
+class _Announcement:
+    text: str
+    """the phrase to speak, if the announcement cannot be merged with others"""
+
+    subject: str | None = None
+    """who the announcement is about, for announcements that can be merged"""
+
+    event: str | None = None
+    """what happened to the subject (e.g. joined), for announcements that can be merged"""
+
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class VoiceQueueStats:
+    """Counters for the announcement queue"""
+
+    queued: int = 0
+    """the number of announcements queued"""
+
+    dropped: int = 0
+    """the number of announcements dropped because the queue was full"""
+
+    spoken: int = 0
+    """the number of utterances played, after merging announcements"""
+
+    wait_seconds: float = 0.0
+    """the total time announcements waited in the queue"""
+
+    max_wait_seconds: float = 0.0
+    """the longest time an announcement waited in the queue"""
+
+
+def _merge_announcements(announcements: list[_Announcement]) -> list[str]:
+    """Merges announcements of the same event into as few phrases as possible,
+    e.g. "A, B and C have joined."
+
+    Phrases are ordered by the first announcement they contain.
+    """
+    groups: dict[str, list[str]] = {}
+    order: list[tuple[str, bool]] = []
+    """(phrase or event, is_event) in the order they should be spoken"""
+    for a in announcements:
+        if a.subject is None or a.event is None:
+            order.append((a.text, False))
+            continue
+        if a.event not in groups:
+            groups[a.event] = []
+            order.append((a.event, True))
+        if a.subject not in groups[a.event]:
+            groups[a.event].append(a.subject)
+
+    phrases: list[str] = []
+    for value, is_event in order:
+        if not is_event:
+            phrases.append(value)
+            continue
+
+        chunk: list[str] = []
+        for subject in groups[value]:
+            if chunk and len(event_phrase([*chunk, subject], value)) > MAX_TTS_LENGTH:
+                phrases.append(event_phrase(chunk, value))
+                chunk = []
+            chunk.append(subject)
+        phrases.append(event_phrase(chunk, value))
+
+    return phrases
 
 
 class BotVoice:
     """A global voice client that controls the bot's voice.
-    The client ensures that audio tracks are queued such that the bot
-    will complete each audio track before it attempts to play the next one.
+    The client ensures that announcements are queued such that the bot
+    will complete each one before it attempts to play the next one.
+
+    Announcements about the same event that arrive within a short window of
+    each other are merged into a single phrase (e.g. "A and B have joined.").
 
     To use, the client must first be initialized during application bootup
 
@@ -32,17 +100,24 @@ class BotVoice:
     BotVoice.init(bot)
     ```
 
-    Then when you want to queue a new audio file, do the following:
+    Then when you want to queue a new announcement, do the following:
 
     ```python
     voice = BotVoice()
-    voice.queue_audio(audio)
+    voice.announce_event(member.display_name, "joined")
     ```
     """
 
+    COALESCE_WINDOW: typing.ClassVar[float] = 0.75
+    """seconds to wait for more announcements before speaking"""
+
+    MAX_QUEUE_DEPTH: typing.ClassVar[int] = 16
+    """the most announcements that can be pending before the oldest are dropped"""
+
+    stats: VoiceQueueStats
     _client: discord.Client
-    _audio_queue: queue.Queue[_Work]
-    _queue_worker: asyncio.Task[None] | None = None
+    _queue: asyncio.Queue[_Announcement]
+    _queue_worker: asyncio.Task[None]
 
     _instance: typing.ClassVar["BotVoice | None"] = None
     __init_flag: typing.ClassVar[bool] = False
@@ -59,75 +134,93 @@ class BotVoice:
 
     @classmethod
     def init(cls, client: discord.Client) -> None:
-        """Initialize the BotVoice client"""
+        """Initialize the BotVoice client. Must be called from within the event loop."""
         cls.__init_flag = True
         voice_client = cls()
         voice_client._client = client
-        voice_client._audio_queue = queue.Queue()
+        voice_client.stats = VoiceQueueStats()
+        voice_client._queue = asyncio.Queue(maxsize=cls.MAX_QUEUE_DEPTH)
+        voice_client._queue_worker = asyncio.create_task(voice_client.__process_queue())
 
-    def queue_audio(self, audio: io.BytesIO) -> None:
-        """Queues TTS audio to be played by the Bot in whatever voice channel it's connected to.
-
-        The bot will process each audio buffer in the queue in order.
-        """
-        self._audio_queue.put(_Work(audio), block=False)
-        logger.info("audio buffer queued")
+    @classmethod
+    def close(cls) -> None:
+        """Stops processing announcements, if the client was initialized"""
+        if cls._instance:
+            cls._instance._queue_worker.cancel()
+        cls._instance = None
+
+    @property
+    def queue_depth(self) -> int:
+        """the number of announcements waiting to be played"""
+        return self._queue.qsize()
+
+    def announce(self, text: str) -> None:
+        """Queues a phrase to be spoken by the Bot in whatever voice channel it's connected to."""
+        self.__enqueue(_Announcement(text))
+
+    def announce_event(self, subject: str, event: str) -> None:
+        """Queues an announcement that the subject had an event (e.g. "joined"), which
+        can be merged with other pending announcements for the same event."""
+        self.__enqueue(
+            _Announcement(event_phrase([subject], event), subject=subject, event=event)
+        )
+
+    def __enqueue(self, announcement: _Announcement) -> None:
+        if self._queue.full():
+            dropped = self._queue.get_nowait()
+            self.stats.dropped += 1
+            logger.warning(f"voice queue is full, dropped {dropped.text!r}")
+
+        self._queue.put_nowait(announcement)
+        self.stats.queued += 1
+        logger.info("announcement queued")
 
-        if self._queue_worker:
-            logger.debug("queue worker is already running... skipping...")
+    async def __process_queue(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.COALESCE_WINDOW)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            now = time.monotonic()
+            for a in batch:
+                wait = now - a.queued_at
+                self.stats.wait_seconds += wait
+                self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, wait)
+
+            for text in _merge_announcements(batch):
+                try:
+                    await self.__speak(text)
+                except Exception:
+                    logger.warning(
+                        "an error occurred while attempting to play the given audio",
+                        exc_info=True,
+                    )
+
+    async def __speak(self, text: str) -> None:
+        guild = self._client.get_guild(CONFIG.GUILD_ID)
+        if not guild:
+            logger.warning("audio was not played because guild not found")
+            return
+        vc = guild.voice_client
+        if not isinstance(vc, discord.VoiceClient) or not vc.is_connected():
+            logger.warning("audio was not played because bot is not in a voice channel")
             return
 
-        def clear_worker_ref(_: asyncio.Task[None]) -> None:
-            self._queue_worker = None
+        source = await load_audio_source(await TTSService().get_audio(text))
 
-        self._queue_worker = asyncio.create_task(self.__process_queue())
-        self._queue_worker.add_done_callback(clear_worker_ref)
+        done = asyncio.Event()
+        loop = asyncio.get_running_loop()
 
-    async def __process_queue(self) -> None:
-        try:
-            work: _Work | None = self._audio_queue.get(block=False)
-        except Exception:
-            logger.warning("audio worker ran without any work queued")
-            return
+        def after_play(error: Exception | None) -> None:
+            if error:
+                logger.warning("audio playback error", exc_info=error)
+            loop.call_soon_threadsafe(done.set)
 
-        async def _play_audio(_work: _Work) -> None:
-            guild = self._client.get_guild(CONFIG.GUILD_ID)
-            if not guild:
-                logger.warning("audio was not played because guild not found")
-                return
-            vc = guild.voice_client
-            if not isinstance(vc, discord.VoiceClient) or not vc.is_connected():
-                logger.warning(
-                    "audio was not played because bot is not in a voice channel"
-                )
-                return
-
-            done = asyncio.Event()
-            loop = asyncio.get_running_loop()
-
-            def after_play(error: Exception | None) -> None:
-                if error:
-                    logger.warning("audio playback error", exc_info=error)
-                loop.call_soon_threadsafe(done.set)
-
-            logger.info("playing audio buffer")
-            vc.play(discord.FFmpegPCMAudio(_work.audio, pipe=True), after=after_play)
-            await done.wait()
-
-        while work:
-            try:
-                await _play_audio(work)
-            except Exception:
-                logger.warning(
-                    "an error occurred while attempting to play the given audio",
-                    exc_info=True,
-                )
-
-            try:
-                work = self._audio_queue.get(block=False)
-            except Exception:
-                logger.info("no more audio work to process")
-                work = None
+        logger.info(f"speaking {text!r}")
+        vc.play(source, after=after_play)
+        self.stats.spoken += 1
+        await done.wait()
 
 
 def get_active_user_ids(voice_client: discord.VoiceClient) -> list[int]:
@@ -169,8 +262,17 @@ async def announcer_rejoin_on_startup(bot: discord.Client) -> None:
     if not vc_to_join:
         return
 
+    bot_name = bot.user.name if bot.user else "Bot"
+    restart_phrase = f"{bot_name} restarted."
+
+    tts = TTSService()
+    tts.prewarm(restart_phrase)
+    for vc in guild.voice_channels:
+        for member in vc.members:
+            if not member.bot:
+                tts.prewarm_member(member.display_name)
+
     logger.info(f"Detected active voice channel on startup. Joining {vc_to_join.name}")
     await vc_to_join.connect(self_deaf=True)
 
-    bot_name = bot.user.name if bot.user else "Bot"
-    BotVoice().queue_audio(generate_tts_audio(f"{bot_name} restarted."))
+    BotVoice().announce(restart_phrase)
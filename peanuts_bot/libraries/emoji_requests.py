@@ -0,0 +1,193 @@
+from dataclasses import dataclass
+from enum import Enum
+import logging
+from pathlib import Path
+import sqlite3
+import time
+import typing
+
+from peanuts_bot.libraries.image import ImageType
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmojiRequestStatus(str, Enum):
+    PENDING = "pending"
+    APPROVING = "approving"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+
+
+@dataclass
+class EmojiRequest:
+    """Holds the contextual information for a given Emoji Request"""
+
+    shortcut: str | None
+    url: str
+    file_type: ImageType
+    file_len: int
+    requester_id: int
+    channel_id: int
+    id: int | None = None
+    """the id of the request in the store, or None if it hasn't been stored yet"""
+    status: EmojiRequestStatus = EmojiRequestStatus.PENDING
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS emoji_requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shortcut TEXT,
+    url TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    file_len INTEGER NOT NULL,
+    requester_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    resolved_at REAL
+);
+CREATE INDEX IF NOT EXISTS emoji_requests_status ON emoji_requests (status);
+"""
+
+_UNRESOLVED = (EmojiRequestStatus.PENDING, EmojiRequestStatus.APPROVING)
+
+_COLUMNS = "id, shortcut, url, file_type, file_len, requester_id, channel_id, status"
+
+
+def _from_row(row: sqlite3.Row) -> EmojiRequest:
+    return EmojiRequest(
+        id=row["id"],
+        shortcut=row["shortcut"],
+        url=row["url"],
+        file_type=ImageType(row["file_type"]),
+        file_len=row["file_len"],
+        requester_id=row["requester_id"],
+        channel_id=row["channel_id"],
+        status=EmojiRequestStatus(row["status"]),
+    )
+
+
+class EmojiRequestStore:
+    """A global store that persists emoji requests, so pending requests can be
+    looked up by id and survive restarts.
+
+    To use, the store must first be initialized during application bootup
+
+    ```python
+    EmojiRequestStore.init(data_dir)
+    ```
+
+    Then when you want to save or look up a request, do the following:
+
+    ```python
+    request_id = EmojiRequestStore().add(request)
+    request = EmojiRequestStore().get(request_id)
+    ```
+    """
+
+    _db: sqlite3.Connection
+
+    _instance: typing.ClassVar["EmojiRequestStore | None"] = None
+    __init_flag: typing.ClassVar[bool] = False
+
+    def __new__(cls) -> "EmojiRequestStore":
+        if cls.__init_flag:
+            cls._instance = super().__new__(cls)
+            cls.__init_flag = False
+
+        if not cls._instance:
+            raise RuntimeError(
+                "EmojiRequestStore must first be initialized by calling `init`"
+            )
+
+        return cls._instance
+
+    @classmethod
+    def init(cls, data_dir: str | Path) -> None:
+        """Initialize the EmojiRequestStore, creating the database if needed"""
+        cls.__init_flag = True
+        store = cls()
+
+        path = Path(data_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        store._db = sqlite3.connect(path / "emoji_requests.sqlite3")
+        store._db.row_factory = sqlite3.Row
+        store._db.execute("PRAGMA journal_mode=WAL")
+        store._db.executescript(_SCHEMA)
+
+        # approvals interrupted by a restart can be retried
+        with store._db:
+            store._db.execute(
+                "UPDATE emoji_requests SET status = ? WHERE status = ?",
+                (EmojiRequestStatus.PENDING.value, EmojiRequestStatus.APPROVING.value),
+            )
+
+        pending = store._db.execute(
+            "SELECT COUNT(*) FROM emoji_requests WHERE status = ?",
+            (EmojiRequestStatus.PENDING.value,),
+        ).fetchone()[0]
+        logger.info(f"loaded emoji request store with {pending} pending requests")
+
+    @classmethod
+    def close(cls) -> None:
+        """Closes the database of the EmojiRequestStore, if it was initialized"""
+        if not cls._instance:
+            return
+
+        cls._instance._db.close()
+        cls._instance = None
+
+    def add(self, req: EmojiRequest) -> int:
+        """Saves a new pending request, and returns its id"""
+        with self._db:
+            cursor = self._db.execute(
+                "INSERT INTO emoji_requests"
+                " (shortcut, url, file_type, file_len, requester_id, channel_id, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    req.shortcut,
+                    req.url,
+                    req.file_type.value,
+                    req.file_len,
+                    req.requester_id,
+                    req.channel_id,
+                    EmojiRequestStatus.PENDING.value,
+                    time.time(),
+                ),
+            )
+
+        if cursor.lastrowid is None:
+            raise RuntimeError("failed to save emoji request")
+        req.id = cursor.lastrowid
+        req.status = EmojiRequestStatus.PENDING
+        return req.id
+
+    def get(self, request_id: int) -> EmojiRequest | None:
+        """Returns the request with the given id, or None if it doesn't exist"""
+        row = self._db.execute(
+            f"SELECT {_COLUMNS} FROM emoji_requests WHERE id = ?", (request_id,)
+        ).fetchone()
+        return _from_row(row) if row else None
+
+    def resolve(
+        self,
+        request_id: int,
+        status: EmojiRequestStatus,
+        *,
+        current: EmojiRequestStatus = EmojiRequestStatus.PENDING,
+    ) -> bool:
+        """Moves a request from the `current` status to the given status, e.g. to
+        approve or reject a pending request.
+
+        Returns False if the request doesn't exist or isn't in the `current`
+        status anymore.
+        """
+        resolved_at = None if status in _UNRESOLVED else time.time()
+        with self._db:
+            cursor = self._db.execute(
+                "UPDATE emoji_requests SET status = ?, resolved_at = ?"
+                " WHERE id = ? AND status = ?",
+                (status.value, resolved_at, request_id, current.value),
+            )
+        return cursor.rowcount > 0
@@ -0,0 +1,215 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import logging
+import time
+from types import SimpleNamespace
+import typing
+
+import aiohttp
+from yarl import URL
+
+from peanuts_bot.libraries.metrics import Histogram
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_connect=10)
+"""The timeout used for any host without an entry in `HOST_TIMEOUTS`"""
+
+HOST_TIMEOUTS: dict[str, aiohttp.ClientTimeout] = {
+    "discord.com": aiohttp.ClientTimeout(total=10, sock_connect=5),
+    "cdn.discordapp.com": aiohttp.ClientTimeout(total=30, sock_connect=5),
+    "media.discordapp.net": aiohttp.ClientTimeout(total=30, sock_connect=5),
+    "www.alphavantage.co": aiohttp.ClientTimeout(total=20, sock_connect=5),
+    "api.mojang.com": aiohttp.ClientTimeout(total=10, sock_connect=5),
+}
+"""Per-host timeouts, keyed by the host name of the request url"""
+
+
+@dataclass
+class HostStats:
+    """Connection pool counters for a single host"""
+
+    requests: int = 0
+    """the number of requests sent to the host"""
+
+    new_connections: int = 0
+    """the number of requests that had to open a new connection"""
+
+    reused_connections: int = 0
+    """the number of requests that were served by a pooled connection"""
+
+    errors: int = 0
+    """the number of requests that failed before a response was received"""
+
+    latency: Histogram = field(default_factory=Histogram)
+    """the time from sending each request until its response was received"""
+
+
+_TraceCallback = Callable[
+    [aiohttp.ClientSession, SimpleNamespace, typing.Any], Awaitable[None]
+]
+
+
+def _subscribe(signal: object, callback: _TraceCallback) -> None:
+    """Adds the callback to a `TraceConfig` signal. aiohttp's signal types can't
+    be satisfied with aiosignal 1.4, so the signal is treated as a plain list."""
+    typing.cast(list[_TraceCallback], signal).append(callback)
+
+
+def get_host_timeout(url: str | URL) -> aiohttp.ClientTimeout:
+    """Returns the timeout configured for the host of the given url"""
+    return HOST_TIMEOUTS.get(URL(url).host or "", DEFAULT_TIMEOUT)
+
+
+class HttpClient:
+    """A global HTTP client that pools connections for every outbound call the
+    bot makes, so each host only pays for DNS and the TCP+TLS handshake once.
+
+    To use, the client must first be initialized during application bootup,
+    and closed on shutdown
+
+    ```python
+    HttpClient.init()
+    ...
+    await HttpClient.close()
+    ```
+
+    Then when you want to make a request, do the following:
+
+    ```python
+    async with HttpClient().request("GET", url) as res:
+        data = await res.json()
+    ```
+    """
+
+    _session: aiohttp.ClientSession
+    stats: dict[str, HostStats]
+
+    _instance: typing.ClassVar["HttpClient | None"] = None
+    __init_flag: typing.ClassVar[bool] = False
+
+    def __new__(cls) -> "HttpClient":
+        if cls.__init_flag:
+            cls._instance = super().__new__(cls)
+            cls.__init_flag = False
+
+        if not cls._instance:
+            raise RuntimeError("HttpClient must first be initialized by calling `init`")
+
+        return cls._instance
+
+    @classmethod
+    def init(cls) -> None:
+        """Initialize the HttpClient. Must be called from within the event loop."""
+        cls.__init_flag = True
+        client = cls()
+        client.stats = {}
+
+        client._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=50,
+                limit_per_host=10,
+                ttl_dns_cache=5 * 60,
+                keepalive_timeout=60,
+            ),
+            timeout=DEFAULT_TIMEOUT,
+            trace_configs=[cls.create_trace_config()],
+        )
+
+    @classmethod
+    def create_trace_config(cls) -> aiohttp.TraceConfig:
+        """Returns a trace config that records a session's requests in the stats
+        of the HttpClient, once it is initialized.
+
+        This lets sessions the client doesn't own (e.g. discord.py's) be tracked
+        alongside it.
+        """
+        trace_config = aiohttp.TraceConfig()
+        _subscribe(trace_config.on_request_start, cls._on_request_start)
+        _subscribe(trace_config.on_request_end, cls._on_request_end)
+        _subscribe(trace_config.on_connection_create_end, cls._on_connection_create)
+        _subscribe(trace_config.on_connection_reuseconn, cls._on_connection_reuse)
+        _subscribe(trace_config.on_request_exception, cls._on_request_exception)
+        return trace_config
+
+    @classmethod
+    async def close(cls) -> None:
+        """Closes the pooled connections of the HttpClient, if it was initialized"""
+        if not cls._instance:
+            return
+
+        await cls._instance._session.close()
+        cls._instance = None
+
+    @asynccontextmanager
+    async def request(
+        self, method: str, url: str | URL, **kwargs: typing.Any
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Sends a request through the pooled session.
+
+        Accepts the same keyword arguments as `aiohttp.ClientSession.request`. If
+        no `timeout` is given, the timeout configured for the url's host is used.
+        """
+        kwargs.setdefault("timeout", get_host_timeout(url))
+        async with self._session.request(method, url, **kwargs) as res:
+            yield res
+
+    @classmethod
+    def _get_stats(cls, ctx: SimpleNamespace) -> HostStats:
+        if not cls._instance:
+            # the stats aren't kept before init or after close
+            return HostStats()
+        return cls._instance.stats.setdefault(
+            getattr(ctx, "host", None) or "unknown", HostStats()
+        )
+
+    @classmethod
+    async def _on_request_start(
+        cls,
+        _: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        ctx.host = params.url.host
+        ctx.start = time.perf_counter()
+        cls._get_stats(ctx).requests += 1
+
+    @classmethod
+    async def _on_request_end(
+        cls,
+        _: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        __: aiohttp.TraceRequestEndParams,
+    ) -> None:
+        cls._get_stats(ctx).latency.observe(time.perf_counter() - ctx.start)
+
+    @classmethod
+    async def _on_connection_create(
+        cls,
+        _: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        __: aiohttp.TraceConnectionCreateEndParams,
+    ) -> None:
+        cls._get_stats(ctx).new_connections += 1
+
+    @classmethod
+    async def _on_connection_reuse(
+        cls,
+        _: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        __: aiohttp.TraceConnectionReuseconnParams,
+    ) -> None:
+        cls._get_stats(ctx).reused_connections += 1
+
+    @classmethod
+    async def _on_request_exception(
+        cls,
+        _: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestExceptionParams,
+    ) -> None:
+        cls._get_stats(ctx).errors += 1
+        logger.debug(f"request to {params.url.host} failed", exc_info=params.exception)
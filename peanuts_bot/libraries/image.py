@@ -2,8 +2,10 @@ import base64
 import io
 import logging
 from enum import Enum
+from pathlib import Path
 import discord
-import aiohttp
+
+from peanuts_bot.libraries.http_client import HttpClient
 
 
 logger = logging.getLogger(__name__)
@@ -34,6 +36,10 @@ class ImageSize(int):
 
 
 MAX_EMOJI_FILE_SIZE = ImageSize(256 * 1024)
+MAX_EMOJI_SOURCE_SIZE = ImageSize(10 * 1024**2)
+"""the largest image that will be downloaded to be shrunk into an emoji"""
+EMOJI_DIMENSION = 128
+"""the largest width or height an emoji is displayed at"""
 
 
 class ImageType(str, Enum):
@@ -85,25 +91,220 @@ def decode_b64_image(image: str, *, filename: str | None = None) -> discord.File
     return discord.File(io.BytesIO(base64.b64decode(image)), filename)
 
 
-async def get_image_metadata(url: str) -> tuple[ImageType, int]:
-    """Uses the headers of the given image url to get the content type and length of the image.
+SNIFF_LENGTH = 16
+"""the number of leading bytes needed to identify an image format"""
+
+
+def sniff_image_type(data: bytes) -> ImageType | None:
+    """Identifies an image format from the magic bytes at the start of the file"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ImageType.PNG
+    if data.startswith(b"\xff\xd8\xff"):
+        return ImageType.JPEG
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return ImageType.GIF
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ImageType.WEBP
+    return None
+
+
+def _parse_content_type(mime: str | None) -> ImageType | None:
+    mime = (mime or "").split(";")[0].strip()
+    try:
+        return ImageType(mime)
+    except ValueError:
+        return ImageType.OTHER if mime.startswith("image/") else None
+
+
+def _parse_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def get_image_metadata(
+    url: str, *, max_size: int | None = None
+) -> tuple[ImageType, int]:
+    """Gets the content type and length of the image at the given url, without
+    downloading the image.
+
+    Tries a `HEAD` request first, then a small `Range` request for the first few
+    bytes, whose magic bytes decide the image type over any content headers.
+    If `max_size` is given and the headers show the image is larger, the
+    header type is returned without sniffing.
 
     Raises `ValueError` if the given URL does not have appropriate content headers for an image.
     """
+    header_type: ImageType | None = None
+    length: int | None = None
+
+    async with HttpClient().request("HEAD", url, allow_redirects=True) as res:
+        if res.ok:
+            header_type = _parse_content_type(res.headers.get("Content-Type"))
+            length = _parse_int(res.headers.get("Content-Length"))
+
+    logger.debug(f"HEAD {header_type=}, {length=}")
+    if length is not None and max_size is not None and length > max_size:
+        return header_type or ImageType.OTHER, length
+
+    async with HttpClient().request(
+        "GET", url, headers={"Range": f"bytes=0-{SNIFF_LENGTH - 1}"}
+    ) as res:
+        if not res.ok:
+            raise ValueError("Invalid image metadata for the given URL")
+
+        header_type = header_type or _parse_content_type(
+            res.headers.get("Content-Type")
+        )
+        if res.status == 206:
+            # e.g. "bytes 0-15/12345", where the total may be "*" if unknown
+            total = res.headers.get("Content-Range", "").rpartition("/")[2]
+            length = _parse_int(total) or length
+        else:
+            length = length or _parse_int(res.headers.get("Content-Length"))
 
-    async with aiohttp.request("GET", url) as res:
-        content_length = res.headers.get("Content-Length")
-        mime = res.headers.get("Content-Type", "").split(";")[0].strip()
+        head = b""
+        while len(head) < SNIFF_LENGTH:
+            chunk = await res.content.read(SNIFF_LENGTH - len(head))
+            if not chunk:
+                break
+            head += chunk
 
-        logger.debug(f"Actual {mime=}, {content_length=}")
+    sniffed_type = sniff_image_type(head)
+    logger.debug(f"Actual {sniffed_type=}, {header_type=}, {length=}")
 
-        if not content_length:
-            raise ValueError("valid image metadata for the given URL")
+    if length is None:
+        raise ValueError("Missing image size for the given URL")
 
-        try:
-            return ImageType(mime), int(content_length)
-        except ValueError as e:
-            if mime.startswith("image/"):
-                return ImageType.OTHER, int(content_length)
+    if sniffed_type:
+        return sniffed_type, length
+    if header_type:
+        return header_type, length
 
-            raise ValueError("Invalid image metadata for the given URL") from e
+    raise ValueError("Invalid image metadata for the given URL")
+
+
+async def download_image(url: str, dest: Path, *, max_size: int) -> int:
+    """Streams the image at the given url to a file, in small chunks.
+
+    Raises `ValueError` as soon as the download exceeds `max_size` bytes.
+    Returns the size of the downloaded image.
+    """
+    size = 0
+    async with HttpClient().request("GET", url) as res:
+        res.raise_for_status()
+        if (_parse_int(res.headers.get("Content-Length")) or 0) > max_size:
+            raise ValueError(f"image is larger than {ImageSize(max_size)}")
+
+        with dest.open("wb") as f:
+            async for chunk in res.content.iter_chunked(64 * 1024):
+                size += len(chunk)
+                if size > max_size:
+                    raise ValueError(f"image is larger than {ImageSize(max_size)}")
+                f.write(chunk)
+
+    return size
+
+
+def shrink_image_to_size(path: str, max_size: int) -> bytes:
+    """Re-encodes the image at the given path until it is at most `max_size` bytes.
+
+    Stills are downscaled. Animated GIFs have their palette, frame count and
+    dimensions reduced, in that order. This is CPU bound, so it is meant to be
+    run in a worker process.
+
+    Raises `ValueError` if the image cannot be shrunk enough.
+    """
+    from PIL import Image
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) <= max_size:
+        return data
+
+    with Image.open(io.BytesIO(data)) as img:
+        if getattr(img, "is_animated", False):
+            return _shrink_animated(img, max_size)
+        return _shrink_still(img, max_size)
+
+
+def _shrinking_dimensions(size: tuple[int, int]) -> list[int]:
+    dim = min(max(size), EMOJI_DIMENSION)
+    dims = []
+    while dim >= 32:
+        dims.append(dim)
+        dim = dim * 3 // 4
+    return dims
+
+
+def _shrink_still(img, max_size: int) -> bytes:
+    if img.format == "JPEG":
+        fmt, mode, options = "JPEG", "RGB", {"quality": 85}
+    else:
+        fmt, mode, options = "PNG", "RGBA", {}
+
+    img = img.convert(mode)
+    for dim in _shrinking_dimensions(img.size):
+        frame = img.copy()
+        frame.thumbnail((dim, dim))
+        buf = io.BytesIO()
+        frame.save(buf, fmt, optimize=True, **options)
+        if buf.tell() <= max_size:
+            return buf.getvalue()
+
+    raise ValueError("image could not be shrunk enough")
+
+
+def _thumbnail(img, dim: int):
+    img = img.copy()
+    img.thumbnail((dim, dim))
+    return img
+
+
+def _shrink_animated(img, max_size: int) -> bytes:
+    from PIL import Image, ImageSequence
+
+    dims = _shrinking_dimensions(img.size)
+    if not dims:
+        raise ValueError("image could not be shrunk enough")
+
+    # only the largest size is scaled from the source, one frame at a time, so
+    # the full size frames are never all held in memory
+    largest = []
+    durations = []
+    for frame in ImageSequence.Iterator(img):
+        scaled = frame.convert("RGBA")
+        scaled.thumbnail((dims[0], dims[0]))
+        largest.append(scaled)
+        durations.append(frame.info.get("duration", 100))
+    loop = img.info.get("loop", 0)
+
+    for dim in dims:
+        frames = largest if dim == dims[0] else [_thumbnail(f, dim) for f in largest]
+        for step in (1, 2, 4):
+            for colors in (256, 64):
+                kept = [
+                    frames[i].quantize(colors, Image.Quantize.FASTOCTREE)
+                    for i in range(0, len(frames), step)
+                ]
+                kept_durations = [
+                    sum(durations[i : i + step]) for i in range(0, len(frames), step)
+                ]
+
+                buf = io.BytesIO()
+                kept[0].save(
+                    buf,
+                    "GIF",
+                    save_all=True,
+                    append_images=kept[1:],
+                    duration=kept_durations,
+                    loop=loop,
+                    disposal=2,
+                    optimize=True,
+                )
+                if buf.tell() <= max_size:
+                    return buf.getvalue()
+
+    raise ValueError("image could not be shrunk enough")
@@ -0,0 +1,160 @@
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass, field, fields, is_dataclass
+import os
+import time
+import typing
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""the upper bounds, in seconds, of the buckets latencies are counted in"""
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+"""the content type of the Prometheus text exposition format"""
+
+MetricType = typing.Literal["counter", "gauge", "histogram", "untyped"]
+Labels = dict[str, str]
+
+
+@dataclass
+class Histogram:
+    """Counts observations (e.g. request latencies) into the `LATENCY_BUCKETS`"""
+
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    """the number of observations in each bucket, plus one for those above the
+    last bucket"""
+
+    sum: float = 0.0
+    """the total of every observation"""
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value: str) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsWriter:
+    """Renders metrics in the Prometheus text exposition format.
+
+    ```python
+    writer = MetricsWriter()
+    writer.add("peanuts_guilds", "gauge", "Guilds the bot is in", [({}, 1)])
+    text = writer.render()
+    ```
+    """
+
+    def __init__(self) -> None:
+        self._lines: list[str] = []
+
+    def add(
+        self,
+        name: str,
+        metric_type: MetricType,
+        help: str,
+        samples: Iterable[tuple[Labels, float]],
+    ) -> None:
+        """Adds a metric, with one sample per set of labels"""
+        self._lines.append(f"# HELP {name} {_escape_help(help)}")
+        self._lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def add_histogram(
+        self, name: str, help: str, samples: Iterable[tuple[Labels, Histogram]]
+    ) -> None:
+        """Adds a histogram, with one set of buckets per set of labels"""
+        self._lines.append(f"# HELP {name} {_escape_help(help)}")
+        self._lines.append(f"# TYPE {name} histogram")
+        for labels, hist in samples:
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, float("inf")), hist.counts):
+                cumulative += count
+                le = {**labels, "le": _format_value(float(bound))}
+                self._lines.append(f"{name}_bucket{_format_labels(le)} {cumulative}")
+            self._lines.append(
+                f"{name}_sum{_format_labels(labels)} {_format_value(hist.sum)}"
+            )
+            self._lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    def add_stats(
+        self, prefix: str, samples: Iterable[tuple[Labels, typing.Any]]
+    ) -> None:
+        """Adds every numeric field of a stats dataclass as its own metric, named
+        `{prefix}_{field}`. Numeric properties (e.g. hit rates) are added as
+        gauges. The samples must all be instances of the same class."""
+        samples = list(samples)
+        if not samples:
+            return
+
+        first = samples[0][1]
+        if not is_dataclass(first) or isinstance(first, type):
+            return
+
+        stats_cls = type(first)
+        summary = (stats_cls.__doc__ or stats_cls.__name__).strip()
+        metrics: list[tuple[str, MetricType]] = [
+            (f.name, "untyped") for f in fields(first)
+        ]
+        metrics += [
+            (name, "gauge")
+            for name, attr in vars(stats_cls).items()
+            if isinstance(attr, property)
+        ]
+        for name, metric_type in metrics:
+            values = [(labels, getattr(s, name)) for labels, s in samples]
+            if not all(
+                isinstance(v, (int, float)) and not isinstance(v, bool)
+                for _, v in values
+            ):
+                continue
+            self.add(f"{prefix}_{name}", metric_type, f"{summary}: {name}", values)
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+def get_process_rss_bytes() -> int | None:
+    """Returns the resident memory of this process, or None if it can't be read
+    on this platform"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def add_process_metrics(writer: MetricsWriter) -> None:
+    """Adds the standard Prometheus process metrics"""
+    writer.add(
+        "process_cpu_seconds_total",
+        "counter",
+        "Total user and system CPU time spent in seconds",
+        [({}, time.process_time())],
+    )
+    if (rss := get_process_rss_bytes()) is not None:
+        writer.add(
+            "process_resident_memory_bytes",
+            "gauge",
+            "Resident memory size in bytes",
+            [({}, rss)],
+        )
@@ -0,0 +1,93 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import logging
+import time
+import typing
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StartupPhase:
+    name: str
+    """the name of the phase (e.g. `load_extension:peanuts_bot.extensions.help`)"""
+
+    started_at: float
+    """seconds after the profiler was created that the phase started"""
+
+    duration: float | None = None
+    """seconds the phase took, or None if it hasn't finished yet"""
+
+
+class StartupProfiler:
+    """Times each phase of the bot's startup, from construction until the bot is
+    first ready.
+
+    Phases may overlap, so concurrent steps are each timed on their own.
+
+    ```python
+    profiler = StartupProfiler()
+    with profiler.phase("sync_commands"):
+        await sync_commands(bot)
+    profiler.mark_ready()
+    ```
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self.phases: list[StartupPhase] = []
+        self.ready_after: float | None = None
+        """seconds it took for the bot to first become ready"""
+
+    def elapsed(self) -> float:
+        """Returns the seconds since the profiler was created"""
+        return time.perf_counter() - self._start
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[StartupPhase]:
+        """Times the phase run within the context"""
+        phase = self.begin(name)
+        try:
+            yield phase
+        finally:
+            self.end(phase)
+
+    def begin(self, name: str) -> StartupPhase:
+        """Starts timing a phase that ends outside the current scope. Prefer
+        `phase` where possible."""
+        phase = StartupPhase(name=name, started_at=self.elapsed())
+        self.phases.append(phase)
+        return phase
+
+    def end(self, phase: StartupPhase) -> None:
+        """Stops timing the phase, if it hasn't been stopped already"""
+        if phase.duration is not None:
+            return
+
+        phase.duration = self.elapsed() - phase.started_at
+        logger.info(
+            f"startup phase {phase.name} took {phase.duration:.3f}s",
+            extra={"startup_phase": phase.name, "duration": phase.duration},
+        )
+
+    def mark_ready(self) -> None:
+        """Records that the bot is ready. Only the first call is recorded."""
+        if self.ready_after is not None:
+            return
+
+        self.ready_after = self.elapsed()
+        slowest = max(self.phases, key=lambda p: p.duration or 0, default=None)
+        logger.info(
+            f"ready after {self.ready_after:.3f}s"
+            + (f", slowest phase was {slowest.name}" if slowest else ""),
+            extra={"startup": self.to_dict()},
+        )
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Returns the timings as a JSON serializable dict"""
+        return {
+            "ready_after": self.ready_after,
+            "phases": [asdict(p) for p in list(self.phases)],
+        }
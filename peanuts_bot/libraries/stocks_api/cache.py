@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+from typing import Generic, TypeVar
+from zoneinfo import ZoneInfo
+
+
+T = TypeVar("T")
+
+MARKET_TZ = ZoneInfo("America/New_York")
+"""the timezone the market hours below are in"""
+
+MARKET_OPEN = time(9, 30)
+"""the time the market opens for a session"""
+
+MARKET_SETTLED = time(16, 30)
+"""the time after the market close by which the daily prices are final"""
+
+INTRADAY_TTL = timedelta(minutes=15)
+"""how long data fetched during a session stays valid"""
+
+
+def _is_trading_day(d: datetime) -> bool:
+    return d.weekday() < 5
+
+
+def get_next_session_open(now: datetime) -> datetime:
+    """returns the start of the next market session after the given time
+
+    Args:
+        now: a timezone aware datetime
+    Returns:
+        the next session open, in the market timezone
+    """
+    now = now.astimezone(MARKET_TZ)
+    candidate = now.replace(
+        hour=MARKET_OPEN.hour, minute=MARKET_OPEN.minute, second=0, microsecond=0
+    )
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while not _is_trading_day(candidate):
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def get_expiry(fetched_at: datetime) -> datetime:
+    """returns when data fetched at the given time should be considered stale
+
+    Data fetched while a session is in progress only lives for `INTRADAY_TTL`.
+    Data fetched after the session has settled stays valid until the next
+    session opens.
+
+    Args:
+        fetched_at: a timezone aware datetime
+    """
+    market_now = fetched_at.astimezone(MARKET_TZ)
+    in_session = (
+        _is_trading_day(market_now)
+        and MARKET_OPEN <= market_now.time() < MARKET_SETTLED
+    )
+    if in_session:
+        return fetched_at + INTRADAY_TTL
+    return get_next_session_open(fetched_at)
+
+
+class MarketHoursCache(Generic[T]):
+    """a bounded LRU cache whose entries expire according to market hours"""
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[datetime, T]] = OrderedDict()
+
+    def get(self, key: str, *, now: datetime | None = None) -> T | None:
+        """returns the cached value for the key, or None if missing or stale"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if (now or datetime.now(MARKET_TZ)) >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: T, *, now: datetime | None = None) -> None:
+        """caches the value for the key, evicting the least recently used entry
+        if the cache is full"""
+        self._entries[key] = (get_expiry(now or datetime.now(MARKET_TZ)), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
@@ -117,6 +117,7 @@ class IStockProvider(ABC, Generic[TStock, TTicker]):
 class StockAPI(Generic[TStock, TTicker]):
     def __init__(self, provider: Type[IStockProvider[TStock, TTicker]]):
         self._provider = provider
+        self._search = alru_cache(maxsize=128, ttl=5 * 60)(self._search_uncached)
 
     async def search_symbol(self, query: str):
         """searches for a ticker symbol matching by either the symbol, or the company
@@ -127,14 +128,12 @@ class StockAPI(Generic[TStock, TTicker]):
             a list of matching tickers, ordered by relevance
         """
 
-        @alru_cache(ttl=5 * 60)
-        async def _search(query):
-            """wrapped as inner function to perserve doc string"""
-            results = await self._provider.search_symbol(query)
-            results.sort(key=lambda r: r.relevance, reverse=True)
-            return results
+        return await self._search(query)
 
-        return await _search(query)
+    async def _search_uncached(self, query: str) -> list[TTicker]:
+        results = await self._provider.search_symbol(query)
+        results.sort(key=lambda r: r.relevance, reverse=True)
+        return results
 
     async def get_stock(self, ticker: str, filter: TimeFilter = TimeFilter.LAST_MONTH):
         """gets the stock history for a ticker
@@ -148,12 +147,8 @@ class StockAPI(Generic[TStock, TTicker]):
             StocksAPIError: if the stock history is not available
         """
 
-        @alru_cache(ttl=5 * 60)
-        async def _get_stock(ticker, filter):
-            stock = await self._provider.get_stock(ticker, filter)
-            stock.daily_prices.sort(key=lambda dp: dp.date)
-            if not stock.daily_prices:
-                raise StocksAPIError(f"history for {ticker} is not available")
-            return stock
-
-        return await _get_stock(ticker, filter)
+        stock = await self._provider.get_stock(ticker, filter)
+        stock.daily_prices.sort(key=lambda dp: dp.date)
+        if not stock.daily_prices:
+            raise StocksAPIError(f"history for {ticker} is not available")
+        return stock
@@ -1,11 +1,13 @@
+import asyncio
 from collections.abc import MutableMapping, MutableSequence
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
 import logging
 import typing
 
-import aiohttp
 from peanuts_bot.config import ALPHAV_CONNECTED
+from peanuts_bot.libraries.http_client import HttpClient
+from peanuts_bot.libraries.stocks_api.cache import MarketHoursCache
 from peanuts_bot.libraries.stocks_api.errors import (
     StocksAPIError,
     StocksAPIRateLimitError,
@@ -70,15 +72,51 @@ class AlphaV(IStockProvider[_StockHistoryAV, _TickerResultAV]):
 
     @staticmethod
     async def get_stock(ticker: str, filter: TimeFilter) -> _StockHistoryAV:
-        resp = await _call_stocks_api("TIME_SERIES_DAILY", symbol=ticker)
-        stock = _parse_stock_api_result(resp)
+        stock = await _get_daily_history(ticker)
 
         max_date = datetime.now()
         min_date = max_date - filter.value
-        stock.daily_prices = [
-            dp for dp in stock.daily_prices if min_date <= dp.date <= max_date
-        ]
-        return stock
+        return replace(
+            stock,
+            daily_prices=[
+                dp for dp in stock.daily_prices if min_date <= dp.date <= max_date
+            ],
+        )
+
+
+_daily_history_cache: MarketHoursCache[_StockHistoryAV] = MarketHoursCache(maxsize=64)
+_daily_history_fetches: dict[str, asyncio.Task[_StockHistoryAV]] = {}
+
+
+async def _get_daily_history(ticker: str) -> _StockHistoryAV:
+    """
+    Gets the full daily history for a ticker, shared by every `TimeFilter`.
+
+    Histories are cached until the market data could have changed, and concurrent
+    lookups for the same ticker share a single api call.
+
+    :param ticker: the ticker symbol
+    :return: the unfiltered stock history
+    """
+    key = ticker.upper()
+    if cached := _daily_history_cache.get(key):
+        logger.debug(f"daily history cache hit for {key}")
+        return cached
+
+    if key not in _daily_history_fetches:
+
+        async def _fetch() -> _StockHistoryAV:
+            try:
+                resp = await _call_stocks_api("TIME_SERIES_DAILY", symbol=key)
+                stock = _parse_stock_api_result(resp)
+                _daily_history_cache.put(key, stock)
+                return stock
+            finally:
+                del _daily_history_fetches[key]
+
+        _daily_history_fetches[key] = asyncio.create_task(_fetch())
+
+    return await asyncio.shield(_daily_history_fetches[key])
 
 
 def _parse_symbol_result(d: dict[str, str]) -> _TickerResultAV:
@@ -152,18 +190,19 @@ async def _call_stocks_api(f: str, /, **kwargs) -> dict:
     """
     kwargs["apikey"] = CONFIG.ALPHAV_KEY
     kwargs["function"] = f
-    async with aiohttp.ClientSession() as session:
-        async with session.get(CONFIG.ALPHAV_API_URL, params=kwargs) as resp:
-            data = await resp.json()
-
-            """Alphavantage API always returns 200 with no response header convention
-            even on a failure. Unfortunately, the only way to detect failure is to look
-            for certain keys in the response body"""
-            if "Note" in data:
-                logger.warning(f"{f} failed due to rate limiting")
-                raise StocksAPIRateLimitError(data["Note"])
-            elif "Error Message" in data:
-                logger.warning(f"{f} stock api failed")
-                raise StocksAPIError(data["Error Message"])
-
-            return data
+    async with HttpClient().request(
+        "GET", CONFIG.ALPHAV_API_URL, params=kwargs
+    ) as resp:
+        data = await resp.json()
+
+        """Alphavantage API always returns 200 with no response header convention
+        even on a failure. Unfortunately, the only way to detect failure is to look
+        for certain keys in the response body"""
+        if "Note" in data:
+            logger.warning(f"{f} failed due to rate limiting")
+            raise StocksAPIRateLimitError(data["Note"])
+        elif "Error Message" in data:
+            logger.warning(f"{f} stock api failed")
+            raise StocksAPIError(data["Error Message"])
+
+        return data
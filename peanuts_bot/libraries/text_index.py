@@ -0,0 +1,95 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Hashable, Iterator
+from typing import Generic, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+
+MIN_TRIGRAM_SCORE = 0.5
+"""the fraction of a query's trigrams a text must contain to count as a match"""
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TextIndex(Generic[K]):
+    """An in-memory index for searching short texts (e.g. names) as they're typed.
+
+    Searches yield prefix matches first, in alphabetical order, followed by
+    fuzzy matches ranked by how many of the query's trigrams they share.
+    """
+
+    def __init__(self) -> None:
+        self._texts: dict[K, str] = {}
+        self._sorted: list[tuple[str, K]] = []
+        self._trigrams: dict[str, set[K]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._texts
+
+    def add(self, key: K, text: str) -> None:
+        """Indexes the text under the key, replacing any text it had before"""
+        self.remove(key)
+
+        text = _normalize(text)
+        self._texts[key] = text
+        insort(self._sorted, (text, key), key=lambda e: e[0])
+        for gram in _trigrams(text):
+            self._trigrams.setdefault(gram, set()).add(key)
+
+    def remove(self, key: K) -> None:
+        """Removes the key from the index, if it was indexed"""
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+
+        i = bisect_left(self._sorted, text, key=lambda e: e[0])
+        while self._sorted[i][1] != key:
+            i += 1
+        del self._sorted[i]
+
+        for gram in _trigrams(text):
+            keys = self._trigrams[gram]
+            keys.discard(key)
+            if not keys:
+                del self._trigrams[gram]
+
+    def search(self, query: str) -> Iterator[K]:
+        """Yields the keys whose text matches the query, best matches first.
+
+        Results are produced lazily, so callers can stop after the first few.
+        """
+        query = _normalize(query)
+
+        seen: set[K] = set()
+        i = bisect_left(self._sorted, query, key=lambda e: e[0])
+        while i < len(self._sorted) and self._sorted[i][0].startswith(query):
+            key = self._sorted[i][1]
+            seen.add(key)
+            yield key
+            i += 1
+
+        if len(query) < 3:
+            return
+
+        query_grams = _trigrams(query)
+        hits: Counter[K] = Counter()
+        for gram in query_grams:
+            hits.update(self._trigrams.get(gram, ()))
+
+        min_hits = len(query_grams) * MIN_TRIGRAM_SCORE
+        for key, count in hits.most_common():
+            if count < min_hits:
+                return
+            if key not in seen:
+                yield key
@@ -1,20 +1,217 @@
-import io
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import hashlib
 import logging
+import os
+from pathlib import Path
+import time
+import typing
 
-from gtts import gTTS  # type: ignore[import-untyped]
+from peanuts_bot.libraries.metrics import Histogram
 
 
 logger = logging.getLogger(__name__)
 
+MAX_TTS_LENGTH = 64
 
-def generate_tts_audio(text: str) -> io.BytesIO:
-    """Generates TTS audio and returns it as an in-memory buffer"""
+TTS_TLD = "co.uk"
+"""the Google Translate domain gTTS synthesizes phrases through"""
 
-    if len(text) > 64:
-        raise ValueError("only tts < 64 characters supported")
 
-    buf = io.BytesIO()
-    tts = gTTS(text, tld="co.uk")
-    tts.write_to_fp(buf)
-    buf.seek(0)
-    return buf
+@dataclass
+class TTSStats:
+    """Synthesis counters for the TTS cache"""
+
+    hits: int = 0
+    """the number of phrases served from the disk cache"""
+
+    misses: int = 0
+    """the number of phrases that had to be synthesized"""
+
+    coalesced: int = 0
+    """the number of requests that joined an identical in-flight synthesis"""
+
+    evictions: int = 0
+    """the number of cached phrases deleted to stay under the size limit"""
+
+    synth_seconds: float = 0.0
+    """the total time spent synthesizing phrases"""
+
+    synth_latency: Histogram = field(default_factory=Histogram)
+    """the time each synthesis took, including the round trip to the TTS api"""
+
+
+def normalize_tts_text(text: str) -> str:
+    """Collapses whitespace so equivalent phrases share a cache entry"""
+    return " ".join(text.split())
+
+
+def event_phrase(subjects: list[str], event: str) -> str:
+    """The phrase announcing that one or more subjects had an event,
+    e.g. "A has joined." or "A, B and C have joined."
+    """
+    if len(subjects) == 1:
+        return f"{subjects[0]} has {event}."
+    return f"{', '.join(subjects[:-1])} and {subjects[-1]} have {event}."
+
+
+def join_phrase(display_name: str) -> str:
+    """The phrase announced when a member joins the bot's voice channel"""
+    return event_phrase([display_name], "joined")
+
+
+def _synthesize(text: str, dest: Path) -> None:
+    """Synthesizes the text to an mp3 file. Blocks on a network round trip."""
+    from gtts import gTTS  # type: ignore[import-untyped]
+
+    tmp = dest.with_suffix(".tmp")
+    gTTS(text, tld=TTS_TLD).save(str(tmp))
+    tmp.replace(dest)
+
+
+def _evict_lru(cache_dir: Path, max_bytes: int) -> int:
+    """Deletes the least recently used phrases until the cache fits in `max_bytes`.
+
+    Files derived from a phrase's audio (e.g. re-encoded copies) share its file
+    stem, and are evicted along with it. Returns the number of evicted phrases.
+    """
+    phrases: dict[str, tuple[int, float, list[Path]]] = {}
+    for f in cache_dir.iterdir():
+        if f.suffix == ".tmp":
+            continue
+        st = f.stat()
+        size, last_used, files = phrases.get(f.stem, (0, 0.0, []))
+        phrases[f.stem] = (size + st.st_size, max(last_used, st.st_mtime), [*files, f])
+
+    total = sum(size for size, _, _ in phrases.values())
+    evicted = 0
+    for size, _, files in sorted(phrases.values(), key=lambda p: p[1]):
+        if total <= max_bytes:
+            break
+        for f in files:
+            f.unlink(missing_ok=True)
+        total -= size
+        evicted += 1
+    return evicted
+
+
+class TTSService:
+    """A global TTS service that synthesizes audio off the event loop.
+
+    Synthesized phrases are kept in a size-bounded LRU cache on disk, and
+    identical phrases requested at the same time share a single synthesis.
+
+    To use, the service must first be initialized during application bootup
+
+    ```python
+    TTSService.init(cache_dir)
+    ```
+
+    Then when you want audio for a phrase, do the following:
+
+    ```python
+    audio_path = await TTSService().get_audio("hello")
+    ```
+    """
+
+    DEFAULT_MAX_CACHE_BYTES: typing.ClassVar[int] = 32 * 1024**2
+    RECENT_MEMBER_LIMIT: typing.ClassVar[int] = 100
+
+    stats: TTSStats
+    _cache_dir: Path
+    _max_cache_bytes: int
+    _in_flight: dict[str, asyncio.Task[Path]]
+    _recent_members: OrderedDict[str, None]
+
+    _instance: typing.ClassVar["TTSService | None"] = None
+    __init_flag: typing.ClassVar[bool] = False
+
+    def __new__(cls) -> "TTSService":
+        if cls.__init_flag:
+            cls._instance = super().__new__(cls)
+            cls.__init_flag = False
+
+        if not cls._instance:
+            raise RuntimeError("TTSService must first be initialized by calling `init`")
+
+        return cls._instance
+
+    @classmethod
+    def init(
+        cls, cache_dir: str | Path, max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES
+    ) -> None:
+        """Initialize the TTSService"""
+        cls.__init_flag = True
+        service = cls()
+        service.stats = TTSStats()
+        service._cache_dir = Path(cache_dir) / "tts"
+        service._cache_dir.mkdir(parents=True, exist_ok=True)
+        service._max_cache_bytes = max_cache_bytes
+        service._in_flight = {}
+        service._recent_members = OrderedDict()
+
+    def get_cache_path(self, text: str) -> Path:
+        """Returns where the audio for the given text is cached on disk"""
+        key = hashlib.sha1(normalize_tts_text(text).casefold().encode()).hexdigest()
+        return self._cache_dir / f"{key}.mp3"
+
+    async def get_audio(self, text: str) -> Path:
+        """Returns the path to an mp3 file of the given text being spoken"""
+        text = normalize_tts_text(text)
+        if len(text) > MAX_TTS_LENGTH:
+            raise ValueError(f"only tts < {MAX_TTS_LENGTH} characters supported")
+
+        path = self.get_cache_path(text)
+        if path.exists():
+            self.stats.hits += 1
+            os.utime(path)
+            return path
+
+        if path.name in self._in_flight:
+            self.stats.coalesced += 1
+            return await asyncio.shield(self._in_flight[path.name])
+
+        self.stats.misses += 1
+        task = asyncio.create_task(self.__synthesize(text, path))
+        self._in_flight[path.name] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(path.name, None))
+        return await asyncio.shield(task)
+
+    def prewarm(self, *texts: str) -> None:
+        """Synthesizes the given phrases in the background if they aren't cached"""
+
+        def _log_failure(task: asyncio.Task[Path]) -> None:
+            if not task.cancelled() and task.exception():
+                logger.warning("failed to prewarm tts", exc_info=task.exception())
+
+        for text in texts:
+            if self.get_cache_path(text).exists():
+                continue
+            asyncio.create_task(self.get_audio(text)).add_done_callback(_log_failure)
+
+    def prewarm_member(self, display_name: str) -> None:
+        """Marks a member as recently seen, and prewarms their join announcement"""
+        if display_name in self._recent_members:
+            self._recent_members.move_to_end(display_name)
+            return
+
+        self._recent_members[display_name] = None
+        while len(self._recent_members) > self.RECENT_MEMBER_LIMIT:
+            self._recent_members.popitem(last=False)
+        self.prewarm(join_phrase(display_name))
+
+    async def __synthesize(self, text: str, path: Path) -> Path:
+        loop = asyncio.get_running_loop()
+
+        start = time.perf_counter()
+        await loop.run_in_executor(None, _synthesize, text, path)
+        duration = time.perf_counter() - start
+        self.stats.synth_seconds += duration
+        self.stats.synth_latency.observe(duration)
+        logger.debug(f"synthesized tts for {text!r}")
+
+        self.stats.evictions += await loop.run_in_executor(
+            None, _evict_lru, self._cache_dir, self._max_cache_bytes
+        )
+        return path
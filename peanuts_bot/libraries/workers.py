@@ -0,0 +1,51 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import logging
+import multiprocessing
+import typing
+
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+P = typing.ParamSpec("P")
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Returns the shared worker process pool, starting it on first use.
+
+    Workers are spawned rather than forked, so they never inherit the event
+    loop or the gateway threads of the bot process.
+    """
+    global _pool
+    if _pool is None:
+        logger.info("starting worker process pool")
+        _pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+async def run_in_process(
+    fn: typing.Callable[P, T], /, *args: P.args, **kwargs: P.kwargs
+) -> T:
+    """Runs a CPU bound function in the worker process pool.
+
+    The function and its arguments must be picklable (e.g. a module level function).
+    Each worker imports the function's module, so it must not import the bot.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_process_pool(), functools.partial(fn, *args, **kwargs)
+    )
+
+
+def shutdown() -> None:
+    """Stops the worker process pool, if it was started"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
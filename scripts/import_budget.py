@@ -0,0 +1,121 @@
+"""
+Reports how long the bot's startup imports take, using `python -X importtime`,
+and fails if they regress.
+
+The check fails when either:
+- a module that should only be imported on first use is imported at startup
+- the total startup import time exceeds the budget
+
+Usage: python scripts/import_budget.py [--budget-ms 2000] [--runs 3] [--top 15]
+"""
+
+import argparse
+from collections import defaultdict
+import os
+import subprocess
+import sys
+from typing import NamedTuple
+
+
+DEFAULT_BUDGET_MS = 2000
+"""the most time the startup imports may take"""
+
+LAZY_MODULES = ("matplotlib", "PIL", "gtts", "mcstatus", "fastapi", "uvicorn")
+"""heavy dependencies that must only be imported when first needed"""
+
+STARTUP_IMPORTS = """
+from dotenv import load_dotenv
+load_dotenv(".env")
+
+import importlib
+import peanuts_bot.bot
+from peanuts_bot.extensions import ALL_EXTENSIONS
+
+for ext in ALL_EXTENSIONS:
+    if ext.migrated and not ext.lazy:
+        importlib.import_module(ext.module_path)
+"""
+"""the imports the bot performs before it connects to the gateway"""
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTime]:
+    """Parses the stderr output of `python -X importtime`"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        name = name[1:]
+        entries.append(
+            ImportTime(
+                module=name.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(len(name) - len(name.lstrip())) // 2,
+            )
+        )
+    return entries
+
+
+def measure(code: str) -> list[ImportTime]:
+    """Runs the code in a fresh interpreter, and returns the timing of each import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        raise SystemExit(f"imports failed with exit code {result.returncode}")
+    return parse_importtime(result.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument(
+        "--runs", type=int, default=3, help="the fastest of this many runs is used"
+    )
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--code", default=STARTUP_IMPORTS, help="the imports to time")
+    args = parser.parse_args()
+
+    runs = [measure(args.code) for _ in range(args.runs)]
+    entries = min(runs, key=lambda r: sum(e.cumulative_us for e in r if e.depth == 0))
+    total_ms = sum(e.cumulative_us for e in entries if e.depth == 0) / 1000
+
+    # attribute each module's own time to its package, since the cumulative
+    # time of a top level import includes every package it pulls in
+    by_package: dict[str, int] = defaultdict(int)
+    for e in entries:
+        by_package[e.module.split(".")[0]] += e.self_us
+
+    print(f"{'package':<32}{'self':>14}")
+    for package, us in sorted(by_package.items(), key=lambda i: -i[1])[: args.top]:
+        print(f"{package:<32}{us / 1000:>11.1f} ms")
+    print(f"{'total':<32}{total_ms:>11.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    imported = {e.module.split(".")[0] for e in entries}
+    eager = [m for m in LAZY_MODULES if m in imported]
+
+    failed = False
+    if eager:
+        print(f"\nFAIL: imported at startup instead of lazily: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"\nFAIL: startup imports took {total_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())